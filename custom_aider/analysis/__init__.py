@@ -0,0 +1,3 @@
+"""
+Python source analysis helpers shared by the code explanation commands
+"""
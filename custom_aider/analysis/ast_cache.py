@@ -0,0 +1,260 @@
+"""Process-wide cache of parsed Python files
+
+ParseCache.get() returns a ParsedFile holding the source, its ``ast``
+tree and a symbol table of every function and class, keyed by the file's
+(path, mtime, size) so an unchanged file is read and parsed only once no
+matter how many commands or completion keystrokes ask for it. Entries
+are evicted least recently used once their estimated memory exceeds a
+budget.
+
+Symbol tables are small and are also persisted to SQLite under
+``~/.extn_aider/cache/ast_symbols.db``, so symbols() can answer for an
+unchanged file after a restart without parsing it at all.
+"""
+
+import os
+import ast
+import json
+import sqlite3
+import threading
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+
+# Memory budget for cached trees, in megabytes
+MAX_CACHE_MB = int(os.environ.get("EXTN_AIDER_AST_CACHE_MB", "128"))
+
+# Set to 0 to keep symbol tables in memory only
+PERSIST_SYMBOLS = os.environ.get("EXTN_AIDER_AST_CACHE_DISK", "1") not in ("", "0")
+
+SYMBOLS_DB = Path.home() / ".extn_aider" / "cache" / "ast_symbols.db"
+
+# Measured size of an ast tree relative to its source text
+AST_BYTES_PER_CHAR = 35
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    symbols TEXT NOT NULL
+);
+"""
+
+# A function or class; parent is the qualified name of the enclosing
+# definition, or None at module level
+Definition = namedtuple("Definition", "name qualname kind start_line end_line parent")
+
+
+def node_kind(node):
+    if isinstance(node, ast.AsyncFunctionDef):
+        return "async function"
+    if isinstance(node, ast.FunctionDef):
+        return "function"
+    return "class"
+
+
+def line_offsets(source):
+    """Offset in source of the start of every line, plus its end"""
+    offsets = [0]
+    position = source.find("\n")
+    while position != -1:
+        offsets.append(position + 1)
+        position = source.find("\n", position + 1)
+    if offsets[-1] != len(source):
+        offsets.append(len(source))
+    return offsets
+
+
+def build_symbols(tree):
+    """Definitions in a module, outer ones before the ones they contain
+
+    Also returns {qualname: node} for the definitions.
+    """
+    definitions = []
+    nodes = {}
+
+    def visit(node, parent):
+        for child in ast.iter_child_nodes(node):
+            if not isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                visit(child, parent)
+                continue
+            qualname = f"{parent}.{child.name}" if parent else child.name
+            if qualname in nodes:
+                # Redefinitions (e.g. under if/else) keep the first one
+                continue
+            start = min([child.lineno] + [d.lineno for d in child.decorator_list])
+            definitions.append(Definition(
+                child.name, qualname, node_kind(child),
+                start, child.end_lineno or child.lineno, parent
+            ))
+            nodes[qualname] = child
+            visit(child, qualname)
+
+    visit(tree, None)
+    return definitions, nodes
+
+
+class ParsedFile:
+    """A parsed source file and its symbol table"""
+
+    __slots__ = ("path", "source", "tree", "symbols", "nodes", "error", "key", "cost", "_offsets")
+
+    def __init__(self, path, key, source, tree=None, error=None):
+        self.path = path
+        self.key = key
+        self.source = source
+        self.tree = tree
+        self.error = error
+        if tree is not None:
+            self.symbols, self.nodes = build_symbols(tree)
+        else:
+            self.symbols, self.nodes = [], {}
+        self.cost = len(source) * (AST_BYTES_PER_CHAR if tree is not None else 1)
+        self._offsets = None
+
+    def line_offsets(self):
+        """line_offsets() of the source, computed once"""
+        if self._offsets is None:
+            self._offsets = line_offsets(self.source)
+        return self._offsets
+
+    def definitions(self, name):
+        """Definitions called name, outermost first"""
+        found = [d for d in self.symbols if d.name == name]
+        return sorted(found, key=lambda d: (d.qualname.count("."), d.start_line))
+
+
+def _fresh_error(error):
+    """Copy of a cached SyntaxError, so raising it does not grow the
+    cached instance's traceback"""
+    return type(error)(*error.args)
+
+
+def _file_key(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ParseCache:
+    """LRU cache of ParsedFiles bounded by estimated memory"""
+
+    def __init__(self, max_bytes=MAX_CACHE_MB << 20, db_path=None):
+        self.max_bytes = max_bytes
+        self.db_path = Path(db_path) if db_path else None
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._db = None
+
+    def get(self, path):
+        """ParsedFile for path, parsing it only if it changed
+
+        Raises OSError if the file cannot be read and SyntaxError if it
+        does not parse; parse failures are cached like successes.
+        """
+        path = os.path.abspath(path)
+        key = _file_key(path)
+        with self._lock:
+            parsed = self._entries.get(path)
+            if parsed is not None and parsed.key == key:
+                self._entries.move_to_end(path)
+                if parsed.error is not None:
+                    raise _fresh_error(parsed.error)
+                return parsed
+
+        source = Path(path).read_text(encoding="utf-8", errors="replace")
+        try:
+            parsed = ParsedFile(path, key, source, tree=ast.parse(source, filename=path))
+        except (SyntaxError, ValueError) as e:
+            error = e if isinstance(e, SyntaxError) else SyntaxError(str(e))
+            # Cached without the frames of this call
+            error.__traceback__ = None
+            parsed = ParsedFile(path, key, source, error=error)
+
+        with self._lock:
+            self._store(parsed)
+            if parsed.error is None:
+                self._save_symbols(parsed)
+        if parsed.error is not None:
+            raise _fresh_error(parsed.error)
+        return parsed
+
+    def symbols(self, path):
+        """Symbol table for path, from memory, disk or a fresh parse"""
+        path = os.path.abspath(path)
+        key = _file_key(path)
+        with self._lock:
+            parsed = self._entries.get(path)
+            if parsed is not None and parsed.key == key and parsed.error is None:
+                self._entries.move_to_end(path)
+                return parsed.symbols
+            symbols = self._load_symbols(path, key)
+        if symbols is not None:
+            return symbols
+        return self.get(path).symbols
+
+    def _store(self, parsed):
+        old = self._entries.pop(parsed.path, None)
+        if old is not None:
+            self._size -= old.cost
+        self._entries[parsed.path] = parsed
+        self._size += parsed.cost
+        # Always keep the newest entry, even if it alone exceeds the budget
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= evicted.cost
+
+    def _connect(self):
+        if self._db is None and self.db_path is not None:
+            try:
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                db = sqlite3.connect(str(self.db_path), timeout=5, check_same_thread=False)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.executescript(SCHEMA)
+                self._db = db
+            except sqlite3.Error:
+                # An unusable cache file only costs the persistence
+                self.db_path = None
+        return self._db
+
+    def _load_symbols(self, path, key):
+        db = self._connect()
+        if db is None:
+            return None
+        row = db.execute(
+            "SELECT symbols FROM files WHERE path = ? AND mtime_ns = ? AND size = ?",
+            (path, key[0], key[1])
+        ).fetchone()
+        if row is None:
+            return None
+        return [Definition(*item) for item in json.loads(row[0])]
+
+    def _save_symbols(self, parsed):
+        db = self._connect()
+        if db is None:
+            return
+        try:
+            db.execute(
+                "INSERT OR REPLACE INTO files (path, mtime_ns, size, symbols) VALUES (?, ?, ?, ?)",
+                (parsed.path, parsed.key[0], parsed.key[1], json.dumps(parsed.symbols))
+            )
+            db.commit()
+        except sqlite3.Error:
+            pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_parse_cache():
+    """Return the process-wide ParseCache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ParseCache(db_path=SYMBOLS_DB if PERSIST_SYMBOLS else None)
+    return _cache
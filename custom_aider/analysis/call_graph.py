@@ -0,0 +1,158 @@
+"""Static extraction of call sites for the repository call graph
+
+extract_calls() lists every call made in a module together with the
+function, class or module body it is made from. Callees are resolved to
+dotted names (``package.module.Class.method``) where the code says
+statically what they are:
+
+- names defined at module level or nested in the calling function
+- names bound by ``import`` / ``from ... import``, relative ones included
+- attributes of imported modules and module-level classes
+- ``self.method()`` and ``cls.method()`` inside a class
+
+Anything else (``obj.method()`` on a local, ``factory().run()``) is kept
+with target None and only its called name, so it can still be reported
+as a possible call of every method with that name. Calls to builtins
+are dropped.
+"""
+
+import ast
+import builtins
+from collections import namedtuple
+
+BUILTINS = frozenset(dir(builtins))
+
+# caller is the qualified name of the calling definition, '' for module
+# level code; target is the resolved dotted callee or None
+CallSite = namedtuple("CallSite", "caller line target name")
+
+_DEFINITIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+
+def module_name(path):
+    """Dotted module name of a repo-relative .py path"""
+    parts = path[:-3].replace("\\", "/").split("/")
+    if parts[-1] == "__init__" and len(parts) > 1:
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+def _imports(tree, module, is_package):
+    """{local name: dotted name} for every import in the module"""
+    package = module.split(".") if is_package else module.split(".")[:-1]
+    names = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    names[alias.asname] = alias.name
+                else:
+                    # "import a.b" binds "a"
+                    root = alias.name.split(".")[0]
+                    names[root] = root
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base = package[:len(package) - node.level + 1]
+                if node.module:
+                    base = base + [node.module]
+                base = ".".join(base)
+            else:
+                base = node.module or ""
+            for alias in node.names:
+                if alias.name != "*":
+                    names[alias.asname or alias.name] = f"{base}.{alias.name}" if base else alias.name
+    return names
+
+
+class _CallCollector(ast.NodeVisitor):
+
+    def __init__(self, module, imports, top_level):
+        self.module = module
+        self.imports = imports
+        self.top_level = top_level
+        # (qualname, is_class, names defined directly in its body)
+        self.scopes = []
+        self.calls = []
+
+    def _visit_definition(self, node, is_class):
+        # Decorators, defaults and bases run in the enclosing scope
+        for child in node.decorator_list:
+            self.visit(child)
+        if is_class:
+            for child in node.bases + node.keywords:
+                self.visit(child)
+        else:
+            self.visit(node.args)
+            if node.returns is not None:
+                self.visit(node.returns)
+
+        parent = self.scopes[-1][0] if self.scopes else ""
+        qualname = f"{parent}.{node.name}" if parent else node.name
+        local = {child.name for child in node.body if isinstance(child, _DEFINITIONS)}
+        self.scopes.append((qualname, is_class, local))
+        for child in node.body:
+            self.visit(child)
+        self.scopes.pop()
+
+    def visit_FunctionDef(self, node):
+        self._visit_definition(node, False)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node):
+        self._visit_definition(node, True)
+
+    def visit_Call(self, node):
+        target, name = self._resolve(node.func)
+        if name is not None:
+            caller = self.scopes[-1][0] if self.scopes else ""
+            self.calls.append(CallSite(caller, node.lineno, target, name))
+        self.generic_visit(node)
+
+    def _enclosing_class(self):
+        """Qualified name of the class whose method is being visited"""
+        if len(self.scopes) >= 2 and not self.scopes[-1][1] and self.scopes[-2][1]:
+            return self.scopes[-2][0]
+        return None
+
+    def _resolve(self, func):
+        """(dotted target or None, called name or None to skip)"""
+        attributes = []
+        while isinstance(func, ast.Attribute):
+            attributes.append(func.attr)
+            func = func.value
+        if not isinstance(func, ast.Name):
+            return None, attributes[0] if attributes else None
+
+        parts = [func.id] + attributes[::-1]
+        root, rest, name = parts[0], parts[1:], parts[-1]
+
+        def join(base):
+            return ".".join([base] + rest)
+
+        # Functions nested in an enclosing function, innermost first
+        for qualname, is_class, local in reversed(self.scopes):
+            if not is_class and root in local:
+                return join(f"{self.module}.{qualname}.{root}"), name
+
+        if root in ("self", "cls") and len(rest) == 1:
+            cls = self._enclosing_class()
+            if cls:
+                return f"{self.module}.{cls}.{name}", name
+        if root in self.top_level:
+            return join(f"{self.module}.{root}"), name
+        if root in self.imports:
+            return join(self.imports[root]), name
+        if not rest and root in BUILTINS:
+            return None, None
+        return None, name
+
+
+def extract_calls(path, tree):
+    """CallSites of a parsed module at the repo-relative path"""
+    module = module_name(path)
+    is_package = path.replace("\\", "/").endswith("/__init__.py") or path == "__init__.py"
+    top_level = {node.name for node in tree.body if isinstance(node, _DEFINITIONS)}
+    collector = _CallCollector(module, _imports(tree, module, is_package), top_level)
+    collector.visit(tree)
+    return collector.calls
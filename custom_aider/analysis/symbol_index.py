@@ -0,0 +1,304 @@
+"""Repository-wide index of Python functions, classes and calls
+
+Every Python file in the repository is parsed once into its definitions
+(name, qualified name, kind, line range and enclosing definition) and
+its call sites (see call_graph.py), which are stored in SQLite under
+``<repo>/.extn_aider/cache/symbols.db`` together with the (mtime, size)
+they were read at. update() stats the files and re-parses only new or
+changed ones, spreading the work over a process pool when there are
+many. Symbol lookups go through an in-memory name -> definitions map,
+so resolving a symbol costs a dict lookup; callers and callees are
+indexed queries on the calls table.
+"""
+
+import os
+import ast
+import sqlite3
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from .ast_cache import build_symbols
+from .call_graph import extract_calls, module_name
+
+# Bump when what scan_file() extracts changes, to rebuild existing indexes
+INDEX_VERSION = "2"
+
+SCAN_WORKERS = os.cpu_count() or 1
+
+# Below this many stale files, parsing in-process beats starting a pool
+PARALLEL_MIN_FILES = 64
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS symbols (
+    path TEXT NOT NULL,
+    name TEXT NOT NULL,
+    qualname TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL,
+    parent TEXT
+);
+CREATE INDEX IF NOT EXISTS symbols_by_path ON symbols (path);
+CREATE TABLE IF NOT EXISTS calls (
+    path TEXT NOT NULL,
+    caller TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    target TEXT,
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS calls_by_caller ON calls (path, caller);
+CREATE INDEX IF NOT EXISTS calls_by_target ON calls (target) WHERE target IS NOT NULL;
+CREATE INDEX IF NOT EXISTS calls_by_name ON calls (name) WHERE target IS NULL;
+"""
+
+# Callers and callees reported for one symbol
+MAX_CALLS = 100
+
+# A definition and the repository-relative file it is in
+IndexedSymbol = namedtuple("IndexedSymbol", "path name qualname kind start_line end_line parent")
+
+# A call made from caller (a qualified name, '' for module level) in path
+Call = namedtuple("Call", "path caller line target name")
+
+
+def full_name(symbol):
+    """Dotted name of an IndexedSymbol, as call targets are written"""
+    return f"{module_name(symbol.path)}.{symbol.qualname}"
+
+
+def scan_file(root, path):
+    """(path, key, definitions, calls) for one file; key is None if it
+    cannot be read or parsed. Runs in worker processes."""
+    full = os.path.join(root, path)
+    try:
+        stat = os.stat(full)
+        with open(full, encoding="utf-8", errors="replace") as f:
+            tree = ast.parse(f.read(), filename=full)
+    except (OSError, SyntaxError, ValueError):
+        return path, None, None, None
+    definitions, _ = build_symbols(tree)
+    calls = extract_calls(path, tree)
+    return (path, (stat.st_mtime_ns, stat.st_size),
+            [tuple(d) for d in definitions], [tuple(c) for c in calls])
+
+
+def _scan_many(root, paths):
+    return [scan_file(root, path) for path in paths]
+
+
+class SymbolIndex:
+    """Definitions of every Python file in one repository"""
+
+    def __init__(self, root, path=None):
+        self.root = str(root)
+        self.path = Path(path) if path else Path(root) / ".extn_aider" / "cache" / "symbols.db"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = self._open()
+        self._lock = threading.Lock()
+        self._files = {}
+        self._by_path = {}
+        self._by_name = {}
+        self._by_full_name = {}
+        self._load()
+
+    def _connect(self):
+        db = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    def _open(self):
+        db = self._connect()
+        db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        built = db.execute("SELECT 1 FROM sqlite_master WHERE name = 'files'").fetchone()
+        if built and (row is None or row[0] != INDEX_VERSION):
+            # Older layout; rebuild from scratch
+            db.close()
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{self.path}{suffix}").unlink(missing_ok=True)
+            db = self._connect()
+        db.executescript(SCHEMA)
+        db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (INDEX_VERSION,))
+        db.commit()
+        return db
+
+    def _load(self):
+        self._files = {
+            path: (mtime_ns, size)
+            for path, mtime_ns, size in self.db.execute("SELECT path, mtime_ns, size FROM files")
+        }
+        for row in self.db.execute("SELECT * FROM symbols ORDER BY path, start_line"):
+            symbol = IndexedSymbol(*row)
+            self._by_path.setdefault(symbol.path, []).append(symbol)
+            self._by_name.setdefault(symbol.name, []).append(symbol)
+            self._by_full_name.setdefault(full_name(symbol), symbol)
+
+    def _stale(self, paths):
+        """Files among paths that are new or changed since indexed"""
+        stale = []
+        for path in paths:
+            try:
+                stat = os.stat(os.path.join(self.root, path))
+            except OSError:
+                continue
+            if self._files.get(path) != (stat.st_mtime_ns, stat.st_size):
+                stale.append(path)
+        return stale
+
+    def _scan(self, paths, workers):
+        if len(paths) < PARALLEL_MIN_FILES or workers <= 1:
+            return _scan_many(self.root, paths)
+        # Batches keep per-task pickling overhead low
+        size = max(16, len(paths) // (workers * 4))
+        batches = [paths[i:i + size] for i in range(0, len(paths), size)]
+        results = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for batch in executor.map(_scan_many, [self.root] * len(batches), batches):
+                results.extend(batch)
+        return results
+
+    def _forget(self, path):
+        for symbol in self._by_path.pop(path, []):
+            if self._by_full_name.get(full_name(symbol)) is symbol:
+                del self._by_full_name[full_name(symbol)]
+            same = [s for s in self._by_name.get(symbol.name, []) if s.path != path]
+            if same:
+                self._by_name[symbol.name] = same
+            else:
+                self._by_name.pop(symbol.name, None)
+        self._files.pop(path, None)
+
+    def update(self, list_files, workers=SCAN_WORKERS):
+        """Re-index new and changed Python files; returns how many"""
+        paths = [path for path in list_files() if path.endswith(".py")]
+        with self._lock:
+            current = set(paths)
+            removed = [path for path in self._files if path not in current]
+            stale = self._stale(paths)
+            if not stale and not removed:
+                return 0
+
+            results = self._scan(stale, workers)
+            db = self.db
+            for path in removed:
+                self._forget(path)
+                db.execute("DELETE FROM files WHERE path = ?", (path,))
+                db.execute("DELETE FROM symbols WHERE path = ?", (path,))
+                db.execute("DELETE FROM calls WHERE path = ?", (path,))
+            for path, key, definitions, calls in results:
+                self._forget(path)
+                db.execute("DELETE FROM symbols WHERE path = ?", (path,))
+                db.execute("DELETE FROM calls WHERE path = ?", (path,))
+                if key is None:
+                    # Unparsable for now; retried on the next update
+                    db.execute("DELETE FROM files WHERE path = ?", (path,))
+                    continue
+                symbols = [IndexedSymbol(path, *definition) for definition in definitions]
+                db.executemany("INSERT INTO symbols VALUES (?, ?, ?, ?, ?, ?, ?)", symbols)
+                db.executemany(
+                    "INSERT INTO calls (path, caller, line, target, name) VALUES (?, ?, ?, ?, ?)",
+                    [(path,) + tuple(call) for call in calls]
+                )
+                db.execute(
+                    "INSERT OR REPLACE INTO files (path, mtime_ns, size) VALUES (?, ?, ?)",
+                    (path, key[0], key[1])
+                )
+                self._files[path] = key
+                self._by_path[path] = symbols
+                for symbol in symbols:
+                    self._by_name.setdefault(symbol.name, []).append(symbol)
+                    self._by_full_name.setdefault(full_name(symbol), symbol)
+            db.commit()
+            return len(stale)
+
+    def lookup(self, target):
+        """Definitions matching target
+
+        target is a name (``parse``), a qualified name suffix
+        (``Parser.parse``), or either prefixed by a file
+        (``app/parser.py:parse``).
+        """
+        path = None
+        if ":" in target:
+            path, target = target.rsplit(":", 1)
+            path = path.replace("\\", "/")
+        name = target.rsplit(".", 1)[-1]
+        matches = self._by_name.get(name, [])
+        if "." in target:
+            matches = [
+                s for s in matches
+                if s.qualname == target or s.qualname.endswith(f".{target}")
+            ]
+        if path:
+            matches = [s for s in matches if s.path == path or s.path.endswith(f"/{path}")]
+            # So that a file:qualname printed for a duplicate is unique
+            exact = [s for s in matches if s.qualname == target]
+            if exact:
+                matches = exact
+        return list(matches)
+
+    def symbols_in(self, path):
+        """Definitions in one file, in source order"""
+        return list(self._by_path.get(path, []))
+
+    def resolve(self, target):
+        """IndexedSymbol for a dotted call target, or None if external"""
+        return self._by_full_name.get(target) if target else None
+
+    def callers(self, symbol, limit=MAX_CALLS):
+        """(calls, possible_calls) of symbol, each a list of Calls
+
+        possible_calls are calls whose callee could not be resolved but
+        has the symbol's name, such as obj.method() on a local.
+        """
+        with self._lock:
+            calls = self.db.execute(
+                "SELECT path, caller, line, target, name FROM calls WHERE target = ? "
+                "ORDER BY path, line LIMIT ?",
+                (full_name(symbol), limit)
+            ).fetchall()
+            possible = self.db.execute(
+                "SELECT path, caller, line, target, name FROM calls "
+                "WHERE target IS NULL AND name = ? ORDER BY path, line LIMIT ?",
+                (symbol.name, limit)
+            ).fetchall()
+        return [Call(*row) for row in calls], [Call(*row) for row in possible]
+
+    def callees(self, symbol, limit=MAX_CALLS):
+        """Calls made directly from symbol's body, in source order"""
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT path, caller, line, target, name FROM calls "
+                "WHERE path = ? AND caller = ? ORDER BY line LIMIT ?",
+                (symbol.path, symbol.qualname, limit)
+            ).fetchall()
+        return [Call(*row) for row in rows]
+
+    def caller_symbol(self, call):
+        """IndexedSymbol a call is made from, None for module level code"""
+        for symbol in self._by_path.get(call.path, []):
+            if symbol.qualname == call.caller:
+                return symbol
+        return None
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_symbol_index(root, list_files):
+    """Shared, up to date SymbolIndex for a repository root"""
+    root = os.path.realpath(root)
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = _indexes[root] = SymbolIndex(root)
+    index.update(list_files)
+    return index
@@ -1,95 +1,125 @@
 """Commands for interacting with aichat API endpoints"""
 
 import requests
-import json
 from ..commands_registry import CommandsRegistry
+from ..rag.aichat_client import get_client, get_discovery
+from ..rag.packing import get_token_counter, pack_chunks, split_budget_arg, split_context
 
 def cmd_aichat_rag_query(self, args):
     """Query a RAG using the aichat API endpoint
-    Usage: /query_rag_from_aichat <rag_name> <query>
+    Usage: /query_rag_from_aichat <rag_name>[,<rag_name>...] <query>[ | <query>...] [--budget=N]
     
     Searches the specified RAG for content relevant to your query
-    using the aichat RAG search API endpoint.
+    using the aichat RAG search API endpoint. Several RAG names
+    (comma separated) and queries (separated by |) are searched
+    concurrently. Repeated passages are dropped and the context is
+    trimmed to a token budget (default 2048).
+    
+    The server defaults to http://localhost:8000; set
+    EXTN_AIDER_AICHAT_URL to use another endpoint. Results are cached
+    for five minutes.
     
     Example:
         /query_rag_from_aichat aichat-wiki "How does feature X work?"
+        /query_rag_from_aichat aichat-wiki,temp setup | configuration
     """
     # Parse arguments
+    args, budget = split_budget_arg(args)
     parts = args.strip().split(maxsplit=1)
     if len(parts) != 2:
-        self.io.tool_error("Usage: /query_rag_from_aichat <rag_name> <query>")
+        self.io.tool_error(
+            "Usage: /query_rag_from_aichat <rag_name>[,<rag_name>...] "
+            "<query>[ | <query>...] [--budget=N]"
+        )
         return
         
-    rag_name, query = parts
-    
-    # Prepare request
-    url = "http://localhost:8000/v1/rags/search"
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "application/json"
-    }
-    payload = {
-        "name": rag_name,
-        "input": query
-    }
+    rag_names = [name for name in parts[0].split(",") if name]
+    queries = [q.strip() for q in parts[1].split(" | ") if q.strip()]
+    searches = [(name, query) for name in rag_names for query in queries]
     
-    # Make request
     try:
-        self.io.tool_output(f"Querying RAG '{rag_name}'...")
-        response = requests.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-        
-        # Extract response data
-        result = response.json()
-        if "data" not in result:
-            raise ValueError("Unexpected response format - missing 'data' field")
-            
-        # Format output
-        context_data = result["data"]
+        self.io.tool_output(f"Querying RAG '{', '.join(rag_names)}'...")
+        results = get_client().search_many(searches)
+    except Exception as e:
+        self.io.tool_error(f"Error querying RAG: {e}")
+        return
         
-        # Extract context from the response
-        # The context is wrapped in <context> tags in the response
-        import re
-        context_match = re.search(r"<context>(.*?)</context>", context_data, re.DOTALL)
-        if not context_match:
-            raise ValueError("No context found in response")
+    chunks = []
+    for rag_name, query, context, error in results:
+        if isinstance(error, requests.exceptions.ConnectionError):
+            self.io.tool_error("Could not connect to aichat API. Is the server running?")
+        elif isinstance(error, requests.exceptions.Timeout):
+            self.io.tool_error(f"Request to aichat API timed out for '{rag_name}'")
+        elif isinstance(error, requests.exceptions.HTTPError):
+            self.io.tool_error(f"API request failed for '{rag_name}': {error}")
+        elif isinstance(error, ValueError):
+            self.io.tool_error(f"Error processing response from '{rag_name}': {error}")
+        elif error is not None:
+            self.io.tool_error(f"Error querying RAG '{rag_name}': {error}")
+        else:
+            chunks.extend(split_context(context, rag_name))
             
-        context = context_match.group(1).strip()
-        
-        # Format the output
-        output = [
-            f"\nResults from aichat RAG '{rag_name}':",
-            f"\nQuery: {query}\n",
-            "Context:",
-            context,
-            "\n--- End of results ---"
-        ]
-        
-        formatted_output = "\n".join(output)
-        
-        # Display results
-        self.io.tool_output(formatted_output)
-        
-        # Add to chat context
-        self.coder.cur_messages += [
-            dict(role="user", content=formatted_output),
-            dict(role="assistant", content="Ok."),
-        ]
+    if not chunks:
+        return
         
+    # Pack the context into the main model's token budget
+    counter = get_token_counter(self.coder.main_model)
+    packed, trimmed = pack_chunks(chunks, budget, counter)
+    if len(rag_names) > 1:
+        context = "\n\n".join(f"[{chunk['source']}]\n{chunk['text']}" for chunk in packed)
+    else:
+        context = "\n\n".join(chunk['text'] for chunk in packed)
+    if trimmed:
+        context += f"\n\n({trimmed} passage(s) trimmed to fit {budget} tokens)"
+    
+    # Format the output
+    output = [
+        f"\nResults from aichat RAG '{', '.join(rag_names)}':",
+        f"\nQuery: {' | '.join(queries)}\n",
+        "Context:",
+        context,
+        "\n--- End of results ---"
+    ]
+    
+    formatted_output = "\n".join(output)
+    
+    # Display results
+    self.io.tool_output(formatted_output)
+    
+    # Add to chat context
+    self.coder.cur_messages += [
+        dict(role="user", content=formatted_output),
+        dict(role="assistant", content="Ok."),
+    ]
+
+def cmd_aichat_rag_list(self, args=""):
+    """List the RAGs available on the aichat server
+    Usage: /aichat_rag_list
+    
+    Fetches the RAG names from the aichat API and refreshes the
+    cache used for /aichat_rag_query completions.
+    """
+    try:
+        names = get_discovery().refresh()
     except requests.exceptions.ConnectionError:
         self.io.tool_error("Could not connect to aichat API. Is the server running?")
-    except requests.exceptions.HTTPError as e:
-        self.io.tool_error(f"API request failed: {e}")
-    except ValueError as e:
-        self.io.tool_error(f"Error processing response: {e}")
+        return
     except Exception as e:
-        self.io.tool_error(f"Error querying RAG: {e}")
+        self.io.tool_error(f"Error listing RAGs: {e}")
+        return
+        
+    if not names:
+        self.io.tool_output("No RAGs available on the aichat server")
+        return
+        
+    self.io.tool_output("Available aichat RAGs:")
+    for name in names:
+        self.io.tool_output(f"  {name}")
 
 def completions_aichat_rag_query(self):
     """Completions for query_rag_from_aichat command"""
-    # Return basic defaults since the aichat example doesn't show 
-    # a RAG listing endpoint
-    return ["aichat-wiki", "temp"]
+    # Served from the on-disk cache; refreshed in the background when stale
+    return get_discovery().names()
 
 # Register the command
 CommandsRegistry.register(
@@ -97,3 +127,4 @@ CommandsRegistry.register(
     cmd_aichat_rag_query,
     completions_aichat_rag_query
 )
+CommandsRegistry.register("aichat_rag_list", cmd_aichat_rag_list)
@@ -5,12 +5,11 @@ import json
 import webbrowser
 from datetime import datetime
 from pathlib import Path
-from jinja2 import Template
-
 from ..commands_registry import CommandsRegistry
+from ..gui.template_env import render_page
 
-# Get template directory
-TEMPLATE_DIR = Path(__file__).parent.parent / 'gui' / 'templates' / 'cmd_context_create_tmpl'
+# Template directory under gui/templates
+TEMPLATE_DIR = 'cmd_context_create_tmpl'
 
 def get_context_data(coder):
     """Gather all context data"""
@@ -84,22 +83,8 @@ def cmd_context_create(self, args):
         # Get context data
         context_data = get_context_data(self.coder)
         
-        # Load template files
-        with open(TEMPLATE_DIR / 'base_template.html') as f:
-            template = Template(f.read())
-            
-        with open(TEMPLATE_DIR / 'style.css') as f:
-            styles = f.read()
-            
-        with open(TEMPLATE_DIR / 'script.js') as f:
-            scripts = f.read()
-            
         # Generate HTML
-        html = template.render(
-            context=context_data,
-            styles=styles,
-            scripts=scripts
-        )
+        html = render_page(TEMPLATE_DIR, context=context_data)
         
         # Save the file
         output_dir = Path.cwd() / '.extn_aider' / 'context'
@@ -7,31 +7,53 @@ import warnings
 
 from llama_index.core import (
     Document,
-    StorageContext,
     VectorStoreIndex,
     load_index_from_storage,
 )
 from llama_index.core.node_parser import MarkdownNodeParser
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+from llama_index.core.schema import NodeRelationship, RelatedNodeInfo, TextNode
 from ..commands_registry import CommandsRegistry
+from ..rag.code_chunking import MAX_FILE_BYTES, chunk_file
+from ..rag.dedup import dedupe_nodes
+from ..rag.embeddings import (
+    EMBEDDING_BACKENDS,
+    LEGACY_EMBEDDING,
+    create_embedding,
+    describe,
+    parse_spec,
+)
+from ..rag.embed_server import USE_SERVER, RemoteEmbedding
+from ..rag.storage import FORMATS, convert, dir_size, is_compact, load_storage, save_storage
+from ..rag.packing import (
+    DEFAULT_TOKEN_BUDGET,
+    get_token_counter,
+    pack_chunks,
+    split_budget_arg,
+)
 
 # Suppress FutureWarning from tree-sitter
 warnings.simplefilter("ignore", category=FutureWarning)
 
 # Constants
 RAG_CACHE_DIR = Path.home() / ".extn_aider" / "rags"
+RAG_FORMAT = os.environ.get("EXTN_AIDER_RAG_FORMAT", "compact")
+
+def format_size(size):
+    """Human readable byte count"""
+    if size < 1024:
+        return f"{size}B"
+    elif size < 1024 * 1024:
+        return f"{size/1024:.1f}KB"
+    return f"{size/1024/1024:.1f}MB"
 
 class RAGManager:
     """Manages RAG operations and persistence using aider's help infrastructure"""
     
-    def __init__(self):
-        """Initialize RAG manager with HuggingFace embeddings"""
-        os.environ["TOKENIZERS_PARALLELISM"] = "true"
-        self.embed_model = HuggingFaceEmbedding(
-            model_name="BAAI/bge-small-en-v1.5"
-        )
+    def __init__(self, cache_dir=None):
+        """Initialize RAG manager; embedding models are loaded on first use"""
+        self._embed_models = {}
         self.parser = MarkdownNodeParser()
-        self.cache_dir = RAG_CACHE_DIR
+        self.cache_dir = Path(cache_dir) if cache_dir else RAG_CACHE_DIR
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.metadata_file = self.cache_dir / "metadata.json"
         self.metadata = self._load_metadata()
@@ -49,15 +71,40 @@ class RAGManager:
         """Save RAG metadata to disk"""
         self.metadata_file.write_text(json.dumps(self.metadata, indent=2))
 
-    def create_rag(self, nickname: str, doc_path: str) -> str:
+    def get_embed_model(self, spec=None):
+        """Return the (cached) embedding model and its description for a spec"""
+        backend, model = parse_spec(spec)
+        key = f"{backend}:{model}"
+        if key not in self._embed_models:
+            if USE_SERVER:
+                # Share one model instance between sessions via the local server
+                embed_model = RemoteEmbedding(spec=key)
+            else:
+                embed_model = create_embedding(key)
+            self._embed_models[key] = (embed_model, describe(key, embed_model))
+        return self._embed_models[key]
+
+    def embed_model_for(self, nickname: str):
+        """Return the embedding model a RAG was built with, checking compatibility"""
+        recorded = self.metadata.get(nickname, {}).get("embedding", LEGACY_EMBEDDING)
+        embed_model, info = self.get_embed_model(f"{recorded['backend']}:{recorded['model']}")
+        if info["dim"] != recorded["dim"]:
+            raise ValueError(
+                f"RAG '{nickname}' was built with {recorded['dim']}-dimensional embeddings "
+                f"but {info['backend']}:{info['model']} produces {info['dim']}"
+            )
+        return embed_model
+
+    def create_rag(self, nickname: str, doc_path: str, embed: str = None,
+                   fmt: str = RAG_FORMAT) -> str:
         """Create a new RAG from document"""
+        rag_dir = self.cache_dir / nickname
         try:
             doc_path = Path(doc_path).resolve()
             if not doc_path.exists():
                 return f"Error: Document not found at {doc_path}"
 
             # Create RAG directory
-            rag_dir = self.cache_dir / nickname
             if rag_dir.exists():
                 return f"Error: RAG '{nickname}' already exists"
 
@@ -76,25 +123,32 @@ class RAGManager:
                 )
             )
 
-            # Parse nodes
+            # Parse nodes, storing repeated passages only once
             nodes = self.parser.get_nodes_from_documents([doc])
+            nodes, duplicates = dedupe_nodes(nodes)
 
             # Create and save index
-            index = VectorStoreIndex(nodes, embed_model=self.embed_model)
+            embed_model, embedding = self.get_embed_model(embed)
+            index = VectorStoreIndex(nodes, embed_model=embed_model)
             
             # Save index
             rag_dir.mkdir(parents=True, exist_ok=True)
-            index.storage_context.persist(persist_dir=str(rag_dir))
+            save_storage(index.storage_context, rag_dir, fmt)
 
             # Update metadata
             self.metadata[nickname] = {
                 "path": str(doc_path),
                 "created": datetime.now().isoformat(),
-                "num_nodes": len(nodes)
+                "num_nodes": len(nodes),
+                "num_duplicates": duplicates,
+                "embedding": embedding,
             }
             self._save_metadata()
 
-            return f"Successfully created RAG '{nickname}' with {len(nodes)} chunks"
+            result = f"Successfully created RAG '{nickname}' with {len(nodes)} chunks"
+            if duplicates:
+                result += f" ({duplicates} duplicate chunks merged)"
+            return result
 
         except Exception as e:
             # Clean up if failed
@@ -102,47 +156,236 @@ class RAGManager:
                 shutil.rmtree(rag_dir)
             return f"Error creating RAG: {str(e)}"
 
-    def query_rag(self, nickname: str, query: str, k: int = 3, coder=None) -> str:
-        """Query an existing RAG"""
+    def _load_index(self, nickname: str):
+        """Load the persisted index of a RAG"""
+        storage_context = load_storage(self.cache_dir / nickname)
+        return load_index_from_storage(
+            storage_context,
+            embed_model=self.embed_model_for(nickname)
+        )
+
+    def _code_nodes(self, root: Path, relpath: str):
+        """Build index nodes for the chunks of one repository file"""
+        path = root / relpath
         try:
-            if nickname not in self.metadata:
-                return f"Error: RAG '{nickname}' not found"
+            if path.stat().st_size > MAX_FILE_BYTES:
+                return []
+            text = path.read_text(encoding='utf-8')
+        except (OSError, UnicodeDecodeError):
+            # Missing, unreadable or binary files are not indexed
+            return []
+
+        nodes = []
+        for chunk in chunk_file(text, relpath):
+            nodes.append(TextNode(
+                id_=f"{relpath}:{chunk['start_line']}-{chunk['end_line']}",
+                text=chunk['text'],
+                metadata=dict(
+                    filename=relpath,
+                    symbol=chunk['symbol'] or '',
+                    start_line=chunk['start_line'],
+                    end_line=chunk['end_line'],
+                ),
+                excluded_embed_metadata_keys=['start_line', 'end_line'],
+                excluded_llm_metadata_keys=['start_line', 'end_line'],
+                # Group chunks by file so a changed file can be dropped in one call
+                relationships={
+                    NodeRelationship.SOURCE: RelatedNodeInfo(node_id=relpath)
+                },
+            ))
+        return nodes
+
+    def create_repo_rag(self, nickname: str, root: str, files, commit: str,
+                        embed: str = None, fmt: str = RAG_FORMAT) -> str:
+        """Create a code RAG over repository files using AST-aware chunks"""
+        rag_dir = self.cache_dir / nickname
+        try:
+            if rag_dir.exists():
+                return f"Error: RAG '{nickname}' already exists"
+
+            root = Path(root).resolve()
+            nodes = []
+            for relpath in files:
+                nodes.extend(self._code_nodes(root, relpath))
+            if not nodes:
+                return "Error: No indexable text files found in repository"
+
+            embed_model, embedding = self.get_embed_model(embed)
+            index = VectorStoreIndex(nodes, embed_model=embed_model, show_progress=True)
+
+            rag_dir.mkdir(parents=True, exist_ok=True)
+            save_storage(index.storage_context, rag_dir, fmt)
+
+            now = datetime.now().isoformat()
+            self.metadata[nickname] = {
+                "type": "repo",
+                "path": str(root),
+                "commit": commit,
+                "created": now,
+                "updated": now,
+                "num_nodes": len(nodes),
+                "num_files": len({node.metadata['filename'] for node in nodes}),
+                "embedding": embedding,
+            }
+            self._save_metadata()
+
+            return (f"Successfully created RAG '{nickname}' with {len(nodes)} chunks "
+                    f"at commit {commit[:7]}")
+
+        except Exception as e:
+            if rag_dir.exists():
+                shutil.rmtree(rag_dir)
+            return f"Error creating RAG: {str(e)}"
+
+    def rebuild_repo_rag(self, nickname: str, root: str, files, commit: str,
+                         embed: str = None) -> str:
+        """Re-create a code RAG from scratch, keeping the old one until done
+
+        The new index is built under a temporary nickname and swapped in
+        only once complete, so a failed or interrupted rebuild leaves the
+        existing RAG usable.
+        """
+        building = f"{nickname}.rebuild"
+        try:
+            # Leftovers of an earlier interrupted rebuild
+            self.metadata.pop(building, None)
+            shutil.rmtree(self.cache_dir / building, ignore_errors=True)
+
+            fmt = "compact" if is_compact(self.cache_dir / nickname) else RAG_FORMAT
+            result = self.create_repo_rag(building, root, files, commit, embed, fmt)
+            if building not in self.metadata:
+                return result
 
             rag_dir = self.cache_dir / nickname
-            if not rag_dir.exists():
-                return f"Error: RAG directory for '{nickname}' not found"
+            old_dir = rag_dir.with_name(rag_dir.name + ".old")
+            shutil.rmtree(old_dir, ignore_errors=True)
+            if rag_dir.exists():
+                rag_dir.rename(old_dir)
+            (self.cache_dir / building).rename(rag_dir)
+            self.metadata[nickname] = self.metadata.pop(building)
+            self._save_metadata()
+            shutil.rmtree(old_dir, ignore_errors=True)
+        finally:
+            # Never leave the temporary RAG behind, even when interrupted
+            if self.metadata.pop(building, None) is not None:
+                self._save_metadata()
+            shutil.rmtree(self.cache_dir / building, ignore_errors=True)
+
+        info = self.metadata[nickname]
+        return (f"Successfully rebuilt RAG '{nickname}' with {info['num_nodes']} chunks "
+                f"at commit {commit[:7]}")
+
+    def update_repo_rag(self, nickname: str, changed, removed, commit: str,
+                        tracked=None) -> str:
+        """Re-embed only the files changed since the RAG's indexed commit
+
+        When tracked (the files that should be indexed) is given, indexed
+        files missing from it, e.g. newly ignored ones, are dropped too.
+        """
+        info = self.metadata.get(nickname)
+        if not info or info.get("type") != "repo":
+            return f"Error: '{nickname}' is not a repository RAG"
+
+        try:
+            rag_dir = self.cache_dir / nickname
+            storage_context = load_storage(rag_dir)
+            if tracked is not None:
+                indexed = set(storage_context.docstore.get_all_ref_doc_info() or {})
+                removed = sorted(set(removed) | (indexed - set(tracked)))
+
+            if not changed and not removed:
+                info["commit"] = commit
+                self._save_metadata()
+                return f"RAG '{nickname}' is up to date at commit {commit[:7]}"
+
+            index = load_index_from_storage(
+                storage_context,
+                embed_model=self.embed_model_for(nickname)
+            )
+            root = Path(info["path"])
+
+            for relpath in set(changed) | set(removed):
+                index.delete_ref_doc(relpath, delete_from_docstore=True)
+
+            nodes = []
+            for relpath in changed:
+                nodes.extend(self._code_nodes(root, relpath))
+            if nodes:
+                index.insert_nodes(nodes)
+
+            save_storage(index.storage_context, rag_dir,
+                         "compact" if is_compact(rag_dir) else "json")
+
+            info["commit"] = commit
+            info["updated"] = datetime.now().isoformat()
+            info["num_nodes"] = len(index.docstore.docs)
+            info["num_files"] = len(index.docstore.get_all_ref_doc_info() or {})
+            self._save_metadata()
+
+            return (f"Updated RAG '{nickname}' to commit {commit[:7]}: "
+                    f"{len(changed)} changed, {len(removed)} removed, "
+                    f"{len(nodes)} chunks re-embedded")
+
+        except Exception as e:
+            return f"Error updating RAG: {str(e)}"
+
+    def retrieve(self, nickname: str, query: str, k: int = 3):
+        """Retrieve the top-k chunks for a query as plain dicts"""
+        rag_dir = self.cache_dir / nickname
+        if not rag_dir.exists():
+            raise FileNotFoundError(f"RAG directory for '{nickname}' not found")
+
+        index = self._load_index(nickname)
+
+        retriever = index.as_retriever(similarity_top_k=k)
+        chunks = []
+        for node in retriever.retrieve(query):
+            metadata = node.metadata or {}
+            source = metadata.get('filename', 'unknown')
+            if 'start_line' in metadata:
+                source = f"{source}:{metadata['start_line']}-{metadata['end_line']}"
+            copies = len(metadata.get('provenance', ()))
+            if copies > 1:
+                source = f"{source} ({copies} occurrences)"
+            chunks.append({
+                'text': node.text.strip(),
+                # Unstripped text that start/end describe, for merging
+                'raw': node.text,
+                'source': source,
+                'score': max(0, min(1, node.score or 0)),  # Clamp between 0 and 1
+                'start': getattr(node.node, 'start_char_idx', None),
+                'end': getattr(node.node, 'end_char_idx', None),
+            })
+        return chunks
+
+    def query_rag(self, nickname: str, query: str, k: int = 3, coder=None,
+                  budget: int = DEFAULT_TOKEN_BUDGET):
+        """Query an existing RAG, packing results into a token budget"""
+        try:
+            if nickname not in self.metadata:
+                return False, f"Error: RAG '{nickname}' not found"
 
-            # Load index
             try:
-                storage_context = StorageContext.from_defaults(
-                    persist_dir=str(rag_dir)
-                )
-                index = load_index_from_storage(
-                    storage_context,
-                    embed_model=self.embed_model
-                )
+                chunks = self.retrieve(nickname, query, k)
+            except FileNotFoundError as e:
+                return False, f"Error: {e}"
             except Exception as e:
-                return f"Error loading RAG: {str(e)}"
+                return False, f"Error loading RAG: {str(e)}"
 
-            # Create retriever
-            retriever = index.as_retriever(similarity_top_k=k)
-
-            # Get results
-            nodes = retriever.retrieve(query)
+            # Deduplicate, merge and trim to the main model's token budget
+            model = coder.main_model if coder else None
+            packed, trimmed = pack_chunks(chunks, budget, get_token_counter(model))
 
             # Format results
             output = [f"\nSearch results from RAG '{nickname}':\n"]
             
-            for i, node in enumerate(nodes, 1):
-                score = node.score or 0
-                relevance = max(0, min(1, score))  # Clamp between 0 and 1
-                
-                output.append(f"\n--- Result {i} (Relevance: {relevance:.2%}) ---")
-                output.append(node.text.strip())
-                if node.metadata:
-                    source = node.metadata.get('filename', 'unknown')
-                    output.append(f"\nSource: {source}")
+            for i, chunk in enumerate(packed, 1):
+                output.append(f"\n--- Result {i} (Relevance: {chunk['score']:.2%}) ---")
+                output.append(chunk['text'])
+                output.append(f"\nSource: {chunk['source']}")
 
+            if trimmed:
+                output.append(f"\n({trimmed} result(s) trimmed to fit {budget} tokens)")
             output.append("\n--- End of results ---")
             outputstr = "\n".join(output)
             return True, outputstr
@@ -163,10 +406,37 @@ class RAGManager:
             output.append(f"\n{nickname}:")
             output.append(f"  Source: {path}")
             output.append(f"  Chunks: {num_nodes}")
+            embedding = info.get('embedding', LEGACY_EMBEDDING)
+            output.append(f"  Embedding: {embedding['backend']}:{embedding['model']} "
+                          f"({embedding['dim']}d)")
+            if info.get('type') == 'repo':
+                output.append(f"  Files: {info.get('num_files', 'unknown')}")
+                output.append(f"  Commit: {info.get('commit', 'unknown')[:7]}")
+            rag_dir = self.cache_dir / nickname
+            if rag_dir.exists():
+                fmt = "compact" if is_compact(rag_dir) else "json"
+                output.append(f"  Disk: {format_size(dir_size(rag_dir))} ({fmt})")
             output.append(f"  Created: {created}")
 
         return "\n".join(output)
 
+    def convert_rag(self, nickname: str, fmt: str) -> str:
+        """Rewrite a RAG's persisted files in another storage format"""
+        if nickname not in self.metadata:
+            return f"Error: RAG '{nickname}' not found"
+
+        rag_dir = self.cache_dir / nickname
+        try:
+            before = dir_size(rag_dir)
+            if not convert(rag_dir, fmt):
+                return f"RAG '{nickname}' already uses the {fmt} format"
+            after = dir_size(rag_dir)
+        except Exception as e:
+            return f"Error converting RAG '{nickname}': {str(e)}"
+
+        return (f"Converted RAG '{nickname}' to {fmt}: "
+                f"{format_size(before)} -> {format_size(after)}")
+
     def delete_rag(self, nickname: str) -> str:
         """Delete a RAG"""
         if nickname not in self.metadata:
@@ -195,12 +465,18 @@ def cmd_createragfromdoc(self, args):
     The document must be a text file - PDFs and other binary formats are not supported.
     The RAG can later be queried using /queryragfromdoc.
     
+    The embedding backend can be chosen with --embed=backend[:model]
+    (huggingface, onnx, onnx-int8 or hash). It is recorded with the RAG
+    and reused for every query.
+    
     Example:
         /createragfromdoc docs_rag /path/to/document.md
+        /createragfromdoc docs_rag /path/to/document.md --embed=onnx-int8
     """
+    args, embed = split_embed_arg(args)
     parts = args.strip().split(maxsplit=1)
     if len(parts) != 2:
-        self.io.tool_error("Usage: /createragfromdoc <nickname> <document_path>")
+        self.io.tool_error("Usage: /createragfromdoc <nickname> <document_path> [--embed=backend]")
         return
         
     nickname, doc_path = parts
@@ -212,29 +488,147 @@ def cmd_createragfromdoc(self, args):
         
     # Create RAG
     self.io.tool_output(f"Creating RAG '{nickname}'...")
-    result = rag_manager.create_rag(nickname, doc_path)
+    result = rag_manager.create_rag(nickname, doc_path, embed)
+    self.io.tool_output(result)
+
+def split_embed_arg(args):
+    """Strip an optional --embed=backend[:model] from command args"""
+    parts = args.split()
+    embed = None
+    for part in parts:
+        if part.startswith("--embed="):
+            embed = part.split("=", 1)[1]
+    if embed is None:
+        return args, None
+    return " ".join(p for p in parts if not p.startswith("--embed=")), embed
+
+def git_changed_files(repo, since_commit, head="HEAD"):
+    """Return (changed, removed) paths between two commits using git diff"""
+    changed, removed = set(), set()
+    output = repo.git.diff("--name-status", "-M", since_commit, head)
+    for line in output.splitlines():
+        parts = line.split("\t")
+        if len(parts) < 2:
+            continue
+        status = parts[0][0]
+        if status == "R":
+            removed.add(parts[1])
+            changed.add(parts[2])
+        elif status == "D":
+            removed.add(parts[1])
+        else:
+            changed.add(parts[-1])
+    return changed, removed
+
+def cmd_createragfromrepo(self, args):
+    """Create or update a code RAG from the current git repository
+    Usage: /createragfromrepo <nickname> [--rebuild] [--embed=backend]
+    
+    Indexes all tracked repository files. Python files are split into
+    function and class level chunks, other files into line windows.
+    Running the command again for an existing repository RAG only
+    re-embeds files changed between the indexed commit and HEAD, and
+    drops files that are no longer tracked or are now ignored.
+    Use --rebuild to discard the index and embed everything again.
+    --embed selects the embedding backend when the RAG is first created.
+    
+    Query it like any other RAG with /queryragfromdoc.
+    
+    Example:
+        /createragfromrepo coderag
+    """
+    args, embed = split_embed_arg(args)
+    parts = args.strip().split()
+    rebuild = "--rebuild" in parts
+    parts = [p for p in parts if p != "--rebuild"]
+    if len(parts) != 1:
+        self.io.tool_error("Usage: /createragfromrepo <nickname> [--rebuild] [--embed=backend]")
+        return
+
+    nickname = parts[0]
+    if not nickname.isalnum():
+        self.io.tool_error("Nickname must be alphanumeric")
+        return
+
+    if not self.coder.repo:
+        self.io.tool_error("No git repository found")
+        return
+
+    repo = self.coder.repo.repo
+    try:
+        head = repo.head.commit.hexsha
+    except ValueError:
+        self.io.tool_error("Repository has no commits yet")
+        return
+
+    info = rag_manager.metadata.get(nickname)
+    if info and info.get("type") != "repo":
+        self.io.tool_error(f"RAG '{nickname}' exists and was not created from a repository")
+        return
+
+    tracked = set(self.coder.get_all_relative_files())
+
+    if info and rebuild:
+        if embed is None:
+            # Keep the backend the RAG was originally built with
+            recorded = info.get("embedding", LEGACY_EMBEDDING)
+            embed = f"{recorded['backend']}:{recorded['model']}"
+        self.io.tool_output(f"Rebuilding RAG '{nickname}' from {len(tracked)} files...")
+        result = rag_manager.rebuild_repo_rag(
+            nickname, self.coder.root, sorted(tracked), head, embed
+        )
+        self.io.tool_output(result)
+        return
+
+    if info is None:
+        self.io.tool_output(f"Creating RAG '{nickname}' from {len(tracked)} files...")
+        result = rag_manager.create_repo_rag(
+            nickname, self.coder.root, sorted(tracked), head, embed
+        )
+        self.io.tool_output(result)
+        return
+
+    try:
+        changed, removed = git_changed_files(repo, info["commit"], head)
+    except Exception as e:
+        self.io.tool_error(f"Could not diff against indexed commit: {e}")
+        self.io.tool_error("Use --rebuild to re-create the index")
+        return
+
+    # Only index files aider tracks (respects .aiderignore)
+    changed = sorted(changed & tracked)
+    removed = sorted(removed)
+
+    self.io.tool_output(
+        f"Updating RAG '{nickname}' from {info['commit'][:7]} to {head[:7]}..."
+    )
+    result = rag_manager.update_repo_rag(nickname, changed, removed, head, tracked)
     self.io.tool_output(result)
 
 def cmd_queryragfromdoc(self, args):
     """Query an existing RAG
-    Usage: /queryragfromdoc <nickname> <query>
+    Usage: /queryragfromdoc <nickname> <query> [--budget=N]
     
     Searches the specified RAG for content relevant to your query
-    and returns the most similar passages.
+    and returns the most similar passages. Overlapping passages are
+    deduplicated, adjacent ones merged, and the result trimmed to a
+    token budget (default 2048) before it is added to the chat.
     
     Example:
         /queryragfromdoc docs_rag "How do I use the git commands?"
+        /queryragfromdoc docs_rag "git commands" --budget=1000
     """
+    args, budget = split_budget_arg(args)
     parts = args.strip().split(maxsplit=1)
     if len(parts) != 2:
-        self.io.tool_error("Usage: /queryragfromdoc <nickname> <query>")
+        self.io.tool_error("Usage: /queryragfromdoc <nickname> <query> [--budget=N]")
         return
         
     nickname, query = parts
     
     # Query RAG
     self.io.tool_output(f"Querying RAG '{nickname}'...")
-    success,result = rag_manager.query_rag(nickname, query, 3)
+    success, result = rag_manager.query_rag(nickname, query, 3, self.coder, budget)
     if success:
         result = result.strip()
         result = "For the query:\n\n" + query + "\n\n" + result
@@ -252,7 +646,8 @@ def cmd_listrag(self, args=""):
     Usage: /listrag
     
     Shows information about all available RAGs including
-    their source documents, number of chunks, and creation dates.
+    their source documents, number of chunks, size on disk
+    and creation dates.
     """
     self.io.tool_output(rag_manager.get_rag_list())
 
@@ -270,20 +665,67 @@ def cmd_deleterag(self, args):
     result = rag_manager.delete_rag(nickname)
     self.io.tool_output(result)
 
+def cmd_convertrag(self, args):
+    """Convert RAGs between the compact and JSON storage formats
+    Usage: /convertrag <nickname|--all> [--format=compact|json]
+    
+    The compact format stores text and metadata compressed and
+    embeddings as raw float32 arrays, which is several times smaller
+    and faster to load than llama-index's JSON files. New RAGs use it
+    by default (set EXTN_AIDER_RAG_FORMAT=json to change that).
+    
+    Example:
+        /convertrag --all
+        /convertrag docs_rag --format=json
+    """
+    parts = args.strip().split()
+    fmt = "compact"
+    for part in parts:
+        if part.startswith("--format="):
+            fmt = part.split("=", 1)[1]
+    names = [p for p in parts if not p.startswith("--")]
+
+    if fmt not in FORMATS:
+        self.io.tool_error(f"Unknown format '{fmt}'. Use one of: {', '.join(FORMATS)}")
+        return
+
+    if "--all" in parts:
+        names = list(rag_manager.metadata.keys())
+    if not names:
+        self.io.tool_error("Usage: /convertrag <nickname|--all> [--format=compact|json]")
+        return
+
+    for nickname in names:
+        self.io.tool_output(rag_manager.convert_rag(nickname, fmt))
+
 def completions_createragfromdoc(self):
     """No completions for createragfromdoc - nickname should be new"""
-    return ["ragnickname", "documentpath"]
+    return ["ragnickname", "documentpath"] + [
+        f"--embed={backend}" for backend in EMBEDDING_BACKENDS
+    ]
+
+def completions_createragfromrepo(self):
+    """Provide completions for createragfromrepo command - existing repository RAGs"""
+    return ["ragnickname", "--rebuild"] + [
+        name for name, info in rag_manager.metadata.items() if info.get("type") == "repo"
+    ]
 
 def completions_queryragfromdoc(self):
     """Provide completions for queryragfromdoc command - existing nicknames"""
     return list(rag_manager.metadata.keys())
 
+def completions_convertrag(self):
+    """Provide completions for convertrag command - existing nicknames and formats"""
+    return ["--all"] + [f"--format={fmt}" for fmt in FORMATS] + list(rag_manager.metadata.keys())
+
 def completions_deleterag(self):
     """Provide completions for deleterag command - existing nicknames"""
     return list(rag_manager.metadata.keys())
 
 # Register commands
 CommandsRegistry.register("createragfromdoc", cmd_createragfromdoc, completions_createragfromdoc)
+CommandsRegistry.register("createragfromrepo", cmd_createragfromrepo, completions_createragfromrepo)
 CommandsRegistry.register("queryragfromdoc", cmd_queryragfromdoc, completions_queryragfromdoc)
 CommandsRegistry.register("listrag", cmd_listrag)
-CommandsRegistry.register("deleterag", cmd_deleterag, completions_deleterag)
\ No newline at end of file
+CommandsRegistry.register("deleterag", cmd_deleterag, completions_deleterag)
+CommandsRegistry.register("convertrag", cmd_convertrag, completions_convertrag)
\ No newline at end of file
@@ -2,27 +2,63 @@
 import os
 import re
 import ast
+import json
+import hashlib
+import textwrap
 import webbrowser
 from pathlib import Path
 from datetime import datetime
-from jinja2 import Template
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from ..commands_registry import CommandsRegistry
+from ..analysis.ast_cache import build_symbols, get_parse_cache, line_offsets
+from ..analysis.call_graph import module_name
+from ..analysis.symbol_index import IndexedSymbol, get_symbol_index
+from ..gui.template_env import read_asset, render_page
 
-# Get template directory
-TEMPLATE_DIR = Path(__file__).parent.parent / 'gui' / 'templates' / 'cmd_explain_tmpl'
+# Template directory under gui/templates
+TEMPLATE_DIR = 'cmd_explain_tmpl'
+
+# Bump when pages generated by /explain --all change, to discard old ones
+SITE_VERSION = "2"
+SITE_WORKERS = os.cpu_count() or 1
+
+# Callers and callees drawn in the call graph diagram, per side
+CALL_GRAPH_NODES = 15
+
+DEFINITION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+# Marks the end of a definition's subtree in _collect_body_info
+_END_OF_DEFINITION = object()
 
 class CodeAnalyzer:
     """Analyzes Python code using AST"""
     
-    def __init__(self, code_text):
+    def __init__(self, code_text, parsed=None):
         self.code_text = code_text
-        self.tree = ast.parse(code_text)
+        self.parsed = parsed
+        self.tree = parsed.tree if parsed is not None else ast.parse(code_text)
+        self._offsets = None
+        self._body_info = {}
+        
+    @classmethod
+    def from_path(cls, path):
+        """Analyzer for a file, using the shared parse cache"""
+        parsed = get_parse_cache().get(path)
+        return cls(parsed.source, parsed)
         
     def find_target(self, target_name):
         """Find a specific function or class definition"""
+        if self.parsed is not None:
+            # Symbol table lookup instead of walking the whole tree
+            if target_name in self.parsed.nodes:
+                return self.analyze_node(self.parsed.nodes[target_name])
+            for definition in self.parsed.definitions(target_name):
+                return self.analyze_node(self.parsed.nodes[definition.qualname])
+            return None
+            
         for node in ast.walk(self.tree):
-            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            if isinstance(node, DEFINITION_NODES):
                 if node.name == target_name:
                     return self.analyze_node(node)
         return None
@@ -54,8 +90,18 @@ class CodeAnalyzer:
         return 'unknown'
         
     def _get_node_source(self, node):
-        """Get source code for a node"""
-        return ast.unparse(node)
+        """Get the original source of a node, decorators included
+        
+        Sliced from the file text by line, so formatting and comments
+        are kept; nested definitions are dedented.
+        """
+        if self._offsets is None:
+            self._offsets = (self.parsed.line_offsets() if self.parsed is not None
+                             else line_offsets(self.code_text))
+        start = min([node.lineno] + [d.lineno for d in getattr(node, 'decorator_list', [])])
+        end = node.end_lineno or node.lineno
+        text = self.code_text[self._offsets[start - 1]:self._offsets[end]]
+        return textwrap.dedent(text).rstrip('\n')
         
     def _analyze_function(self, node):
         """Analyze a function definition"""
@@ -76,6 +122,9 @@ class CodeAnalyzer:
         
     def _analyze_class(self, node):
         """Analyze a class definition"""
+        # First, so one traversal also covers every method below
+        body_info = self._analyze_body(node)
+        
         methods = []
         for item in node.body:
             if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
@@ -84,31 +133,71 @@ class CodeAnalyzer:
         return {
             'methods': methods,
             'bases': [ast.unparse(base) for base in node.bases],
-            'body_info': self._analyze_body(node)
+            'body_info': body_info
         }
         
     def _analyze_body(self, node):
         """Analyze function/class body"""
-        info = {
-            'has_loops': False,
-            'has_conditionals': False,
-            'calls': [],
-            'line_count': len(node.body)
-        }
+        if node not in self._body_info:
+            self._collect_body_info(node)
+        return self._body_info[node]
+        
+    def _collect_body_info(self, root):
+        """Body info of root and every definition nested in it
         
-        for item in ast.walk(node):
-            if isinstance(item, (ast.For, ast.While)):
-                info['has_loops'] = True
-            elif isinstance(item, ast.If):
-                info['has_conditionals'] = True
-            elif isinstance(item, ast.Call) and hasattr(item.func, 'id'):
-                info['calls'].append(item.func.id)
+        One traversal of root's subtree; loops, conditionals and calls
+        count towards every definition enclosing them, so a class
+        includes its methods.
+        """
+        infos = []
+        todo = [root]
+        while todo:
+            node = todo.pop()
+            if node is _END_OF_DEFINITION:
+                infos.pop()
+                continue
                 
-        return info
+            if isinstance(node, DEFINITION_NODES):
+                info = {
+                    'has_loops': False,
+                    'has_conditionals': False,
+                    'calls': [],
+                    'line_count': len(node.body)
+                }
+                self._body_info[node] = info
+                infos.append(info)
+                todo.append(_END_OF_DEFINITION)
+            elif isinstance(node, (ast.For, ast.While)):
+                for info in infos:
+                    info['has_loops'] = True
+            elif isinstance(node, ast.If):
+                for info in infos:
+                    info['has_conditionals'] = True
+            elif isinstance(node, ast.Call) and hasattr(node.func, 'id'):
+                for info in infos:
+                    info['calls'].append(node.func.id)
+                    
+            # Reversed so children are visited in source order
+            todo.extend(reversed(list(ast.iter_child_nodes(node))))
 
 class HTMLExplanationGenerator:
     """Generates HTML explanation for code analysis"""
     
+    @staticmethod
+    def generate_call_graph(analysis):
+        """Generate Mermaid diagram of the callers and callees of the target"""
+        mermaid = ["graph LR", f'    target["{analysis["name"]}"]',
+                   "    style target fill:#2196f3,color:#fff"]
+        for i, caller in enumerate(analysis['callers'][:CALL_GRAPH_NODES]):
+            arrow = "-.->" if caller['possible'] else "-->"
+            mermaid.append(f'    caller{i}["{caller["label"]}"] {arrow} target')
+        # Method calls on unknown objects are listed on the page only
+        callees = [c for c in analysis['callees'] if c['resolved'] or c['external']]
+        for i, callee in enumerate(callees[:CALL_GRAPH_NODES]):
+            arrow = "-->" if callee['resolved'] else "-.->"
+            mermaid.append(f'    target {arrow} callee{i}["{callee["label"]}"]')
+        return "\n".join(mermaid)
+        
     @staticmethod
     def generate_control_flow(analysis):
         """Generate Mermaid diagram showing control flow"""
@@ -137,18 +226,12 @@ class HTMLExplanationGenerator:
         return "\n".join(mermaid)
 
     @staticmethod
-    def generate_html(analysis, level='basic'):
-        """Generate complete HTML document"""
-        # Load template files
-        with open(TEMPLATE_DIR / 'base_template.html') as f:
-            template = Template(f.read())
-            
-        with open(TEMPLATE_DIR / 'style.css') as f:
-            styles = f.read()
-            
-        with open(TEMPLATE_DIR / 'script.js') as f:
-            scripts = f.read()
+    def generate_html(analysis, level='basic', links=None):
+        """Generate complete HTML document
         
+        links optionally holds index_url, parent, parent_url and
+        call_links ({name: url}) for pages of a generated site.
+        """
         # Prepare template context
         context = {
             'name': analysis['name'],
@@ -156,8 +239,6 @@ class HTMLExplanationGenerator:
             'docstring': analysis['docstring'],
             'source': analysis['source'],
             'lineno': analysis['lineno'],
-            'styles': styles,
-            'scripts': scripts,
             'flow_diagram': HTMLExplanationGenerator.generate_control_flow(analysis),
             'line_count': analysis['body_info']['line_count'],
             'has_loops': analysis['body_info']['has_loops'],
@@ -165,6 +246,12 @@ class HTMLExplanationGenerator:
             'calls': analysis['body_info'].get('calls', [])
         }
         
+        # Repo-wide callers and callees, when the call graph index was used
+        if 'callers' in analysis:
+            context['callers'] = analysis['callers']
+            context['callees'] = analysis['callees']
+            context['call_graph'] = HTMLExplanationGenerator.generate_call_graph(analysis)
+        
         # Add function-specific context
         if analysis['type'] in ('function', 'async function'):
             args = analysis.get('args', [])
@@ -182,18 +269,29 @@ class HTMLExplanationGenerator:
             context['signature'] = f"def {analysis['name']}({', '.join(sig_parts)}):"
             context['args'] = args
             
-        # Generate HTML using template
-        return template.render(**context)
+        context.update(links or {})
+        
+        # Generate HTML using the shared, cached template
+        return render_page(TEMPLATE_DIR, **context)
 
 def cmd_explain(self, args):
     """Interactive code explanation
     Usage: /explain <function/class> [--level basic/deep/eli5]
+           /explain --all <module or package path> [--level=...]
+    
+    The target is looked up in every Python file of the repo. Use
+    Class.method or path/to/file.py:name to pick one of several
+    definitions with the same name.
     
     Creates an interactive HTML view that lets you:
     - Click to expand/collapse explanation sections
     - Toggle between abstraction levels
     - See animated control flow diagrams
     - Get real examples from the codebase
+    
+    With --all, every function and class under the path is explained
+    into a linked set of pages with an index. Pages of modules that did
+    not change since the last run are reused.
     """
     if not args.strip():
         self.io.tool_error("Please specify what to explain")
@@ -201,6 +299,12 @@ def cmd_explain(self, args):
         
     # Parse arguments
     parts = args.strip().split()
+    explain_all = parts[0] == '--all'
+    if explain_all:
+        parts = parts[1:]
+        if not parts:
+            self.io.tool_error("Please specify a module or package path after --all")
+            return
     target = parts[0]
     level = "basic"  # default level
     
@@ -210,51 +314,301 @@ def cmd_explain(self, args):
             self.io.tool_error("Invalid level. Use: basic, deep, or eli5")
             return
             
-    # Look for the target in files
-    found = False
-    for fname in self.coder.get_inchat_relative_files():
+    if explain_all:
+        _explain_all(self, target, level)
+        return
+        
+    matches, index = _find_definitions(self, target)
+    if not matches:
+        self.io.tool_error(f"Could not find {target} in any Python files")
+        return
+        
+    if len(matches) > 1:
+        self.io.tool_output(f"{target} is defined in {len(matches)} places:")
+        for match in matches:
+            self.io.tool_output(f"  {match.path}:{match.qualname}  ({match.kind}, line {match.start_line})")
+        self.io.tool_output("Run /explain again with one of the names above")
+        return
+        
+    match = matches[0]
+    try:
+        analyzer = CodeAnalyzer.from_path(self.coder.abs_root_path(match.path))
+        analysis = analyzer.find_target(match.qualname)
+        if not analysis:
+            self.io.tool_error(f"Could not find {target} in {match.path}")
+            return
+            
+        if index is not None:
+            analysis.update(_call_graph(index, match))
+            
+        self.io.tool_output(f"\nAnalyzing {match.qualname} from {match.path}...")
+        
+        # Generate HTML
+        html = HTMLExplanationGenerator.generate_html(analysis, level)
+        
+        # Save HTML file
+        output_dir = Path.cwd() / '.extn_aider' / 'temp' / 'explain'
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_file = output_dir / f"explanation_{match.qualname}_{timestamp}.html"
+        
+        output_file.write_text(html, encoding='utf-8')
+        self.io.tool_output(f"\nSaved explanation to {output_file}")
+        
+        # Open in browser
         try:
-            if not fname.endswith('.py'):
-                continue
-                
-            path = Path(self.coder.abs_root_path(fname))
-            content = path.read_text()
+            webbrowser.open(output_file.as_uri())
+            self.io.tool_output("Opened in default browser")
+        except Exception as e:
+            self.io.tool_error(f"Error opening browser: {e}")
+            self.io.tool_output(f"You can manually open: {output_file}")
+            
+    except Exception as e:
+        self.io.tool_error(f"Error processing {match.path}: {e}")
+
+def _page_name(relpath, qualname):
+    module = relpath[:-3].replace('/', '.').replace('\\', '.')
+    return f"{module}.{qualname}.html"
+
+def render_module_pages(source_path, relpath, output_dir, level):
+    """Write a page for every function and class in one module
+    
+    Returns the index entries of the pages. Calls only link to
+    definitions in the same module, so the pages depend on nothing but
+    the module's source. Runs in worker processes.
+    """
+    source = Path(source_path).read_text(encoding='utf-8', errors='replace')
+    analyzer = CodeAnalyzer(source)
+    definitions, nodes = build_symbols(analyzer.tree)
+    files = {d.qualname: _page_name(relpath, d.qualname) for d in definitions}
+    call_links = {}
+    for definition in definitions:
+        call_links.setdefault(definition.name, files[definition.qualname])
+        
+    pages = []
+    for definition in definitions:
+        analysis = analyzer.analyze_node(nodes[definition.qualname])
+        links = {
+            'index_url': 'index.html',
+            'parent': definition.parent,
+            'parent_url': files.get(definition.parent),
+            'call_links': call_links
+        }
+        html = HTMLExplanationGenerator.generate_html(analysis, level, links)
+        (Path(output_dir) / files[definition.qualname]).write_text(html, encoding='utf-8')
+        docstring = analysis['docstring'].strip()
+        pages.append({
+            'qualname': definition.qualname,
+            'kind': definition.kind,
+            'lineno': definition.start_line,
+            'depth': definition.qualname.count('.'),
+            'summary': docstring.splitlines()[0] if docstring else '',
+            'file': files[definition.qualname]
+        })
+    return pages
+
+def _python_files_under(self, path):
+    """Repo-relative Python files at or under path"""
+    prefix = path.replace('\\', '/').strip('/')
+    if prefix == '.':
+        prefix = ''
+    files = set(self.coder.get_all_relative_files()) | set(self.coder.get_inchat_relative_files())
+    matches = sorted(
+        f for f in files
+        if f.endswith('.py') and (not prefix or f == prefix or f.startswith(prefix + '/'))
+    )
+    if matches:
+        return matches
+        
+    # Untracked files are only found on disk
+    full = Path(self.coder.abs_root_path(prefix))
+    if full.is_file() and full.suffix == '.py':
+        return [prefix]
+    if full.is_dir():
+        root = Path(self.coder.root)
+        return sorted(p.relative_to(root).as_posix() for p in full.rglob('*.py'))
+    return []
+
+def _site_stamp(level):
+    """Changes whenever previously generated pages can no longer be reused"""
+    digest = hashlib.sha1(f"{SITE_VERSION}:{level}".encode())
+    for name in ('base_template.html', 'style.css', 'script.js'):
+        digest.update(read_asset(f'{TEMPLATE_DIR}/{name}').encode('utf-8'))
+    return digest.hexdigest()
+
+def _explain_all(self, path, level):
+    """Render every definition under path into a static site"""
+    modules = _python_files_under(self, path)
+    if not modules:
+        self.io.tool_error(f"No Python files found under {path}")
+        return
+        
+    slug = path.replace('\\', '/').strip('/').replace('/', '_')
+    output_dir = Path.cwd() / '.extn_aider' / 'temp' / 'explain' / 'site' / (slug if slug not in ('', '.') else 'repo')
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_file = output_dir / 'manifest.json'
+    
+    # The manifest maps each module to the hash of the source its pages
+    # were generated from
+    stamp = _site_stamp(level)
+    try:
+        manifest = json.loads(manifest_file.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        manifest = {}
+    previous = manifest.get('modules', {}) if manifest.get('stamp') == stamp else {}
+    
+    entries = {}
+    pending = {}
+    for relpath in modules:
+        try:
+            digest = hashlib.sha1(Path(self.coder.abs_root_path(relpath)).read_bytes()).hexdigest()
+        except OSError:
+            continue
+        entry = previous.get(relpath)
+        if (entry and entry['hash'] == digest
+                and all((output_dir / page['file']).exists() for page in entry['pages'])):
+            entries[relpath] = entry
+        else:
+            pending[relpath] = digest
             
-            analyzer = CodeAnalyzer(content)
-            analysis = analyzer.find_target(target)
+    self.io.tool_output(
+        f"Explaining {len(entries) + len(pending)} modules under {path} "
+        f"({len(entries)} unchanged)..."
+    )
+    
+    def record(relpath, pages=None, error=None):
+        if error is None:
+            entries[relpath] = {'hash': pending[relpath], 'pages': pages}
+        else:
+            entries[relpath] = {'hash': None, 'pages': [], 'error': error}
+            self.io.tool_error(f"Error processing {relpath}: {error}")
             
-            if analysis:
-                found = True
-                self.io.tool_output(f"\nAnalyzing {target} from {fname}...")
-                
-                # Generate HTML
-                html = HTMLExplanationGenerator.generate_html(analysis, level)
-                
-                # Save HTML file
-                output_dir = Path.cwd() / '.extn_aider' / 'temp' / 'explain'
-                output_dir.mkdir(parents=True, exist_ok=True)
-                
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                output_file = output_dir / f"explanation_{target}_{timestamp}.html"
-                
-                output_file.write_text(html, encoding='utf-8')
-                self.io.tool_output(f"\nSaved explanation to {output_file}")
-                
-                # Open in browser
+    jobs = [
+        (self.coder.abs_root_path(relpath), relpath, str(output_dir), level)
+        for relpath in pending
+    ]
+    if len(jobs) > 1 and SITE_WORKERS > 1:
+        with ProcessPoolExecutor(max_workers=min(SITE_WORKERS, len(jobs))) as executor:
+            futures = {executor.submit(render_module_pages, *job): job[1] for job in jobs}
+            for future in as_completed(futures):
                 try:
-                    webbrowser.open(output_file.as_uri())
-                    self.io.tool_output("Opened in default browser")
+                    record(futures[future], pages=future.result())
                 except Exception as e:
-                    self.io.tool_error(f"Error opening browser: {e}")
-                    self.io.tool_output(f"You can manually open: {output_file}")
-                break
+                    record(futures[future], error=str(e))
+    else:
+        for job in jobs:
+            try:
+                record(job[1], pages=render_module_pages(*job))
+            except Exception as e:
+                record(job[1], error=str(e))
                 
-        except Exception as e:
-            self.io.tool_error(f"Error processing {fname}: {e}")
+    # Pages of definitions that no longer exist
+    current = {page['file'] for entry in entries.values() for page in entry['pages']}
+    for entry in previous.values():
+        for page in entry['pages']:
+            if page['file'] not in current:
+                (output_dir / page['file']).unlink(missing_ok=True)
+                
+    index_modules = [
+        {'path': relpath, 'pages': entries[relpath]['pages'], 'error': entries[relpath].get('error')}
+        for relpath in sorted(entries)
+    ]
+    html = render_page(
+        TEMPLATE_DIR, 'index_template.html',
+        title=path,
+        modules=index_modules,
+        page_count=sum(len(m['pages']) for m in index_modules),
+        generated=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    )
+    index_file = output_dir / 'index.html'
+    index_file.write_text(html, encoding='utf-8')
+    manifest_file.write_text(json.dumps({'stamp': stamp, 'modules': entries}), encoding='utf-8')
+    self.io.tool_output(f"\nSaved {len(pending)} regenerated modules, index at {index_file}")
+    
+    try:
+        webbrowser.open(index_file.as_uri())
+        self.io.tool_output("Opened in default browser")
+    except Exception as e:
+        self.io.tool_error(f"Error opening browser: {e}")
+        self.io.tool_output(f"You can manually open: {index_file}")
+
+def _call_graph(index, symbol):
+    """Callers and callees of symbol for the explanation page
+    
+    Call sites from the same function are merged into one entry.
+    """
+    calls, possible = index.callers(symbol)
+    callers = {}
+    for call, is_possible in [(c, False) for c in calls] + [(c, True) for c in possible]:
+        key = (call.path, call.caller)
+        if key in callers:
+            callers[key]['lines'].append(call.line)
+            continue
+        callers[key] = {
+            'label': call.caller or module_name(call.path),
+            'path': call.path,
+            'lines': [call.line],
+            'possible': is_possible
+        }
+        
+    callees = {}
+    for call in index.callees(symbol):
+        key = call.target or call.name
+        if key in callees:
             continue
+        resolved = index.resolve(call.target)
+        if resolved is not None:
+            label, location = resolved.qualname, f"{resolved.path}:{resolved.start_line}"
+        elif call.target:
+            label, location = call.target, "not indexed"
+        else:
+            label, location = f".{call.name}", "unresolved"
+        callees[key] = {
+            'label': label,
+            'location': location,
+            'line': call.line,
+            'resolved': resolved is not None,
+            'external': resolved is None and call.target is not None
+        }
+        
+    for caller in callers.values():
+        caller['location'] = f"{caller['path']}:{', '.join(map(str, caller['lines']))}"
+    return {'callers': list(callers.values()), 'callees': list(callees.values())}
+
+def _find_definitions(self, target):
+    """Definitions of target anywhere in the repo, via the symbol index
+    
+    Returns (definitions, index); index is None when the symbol index
+    could not be used and only chat files were searched. When a name is
+    defined in several files and exactly one of them is in the chat,
+    that one is taken.
+    """
+    inchat = [f for f in self.coder.get_inchat_relative_files() if f.endswith('.py')]
+    
+    def list_files():
+        return set(self.coder.get_all_relative_files()) | set(inchat)
+        
+    try:
+        index = get_symbol_index(self.coder.root, list_files)
+        matches = index.lookup(target)
+    except Exception as e:
+        index = None
+        if self.coder.verbose:
+            self.io.tool_error(f"Symbol index unavailable, searching chat files only: {e}")
+        matches = []
+        for fname in inchat:
+            try:
+                parsed = get_parse_cache().get(self.coder.abs_root_path(fname))
+            except (OSError, SyntaxError):
+                continue
+            matches.extend(IndexedSymbol(fname, *d) for d in parsed.definitions(target))
             
-    if not found:
-        self.io.tool_error(f"Could not find {target} in any Python files")
+    if len(matches) > 1:
+        preferred = [m for m in matches if m.path in inchat]
+        if len(preferred) == 1:
+            return preferred, index
+    return matches, index
 
 def completions_explain(self):
     """Provide completions for explain command"""
@@ -267,24 +621,22 @@ def completions_explain(self):
                 continue
                 
             path = Path(self.coder.abs_root_path(fname))
-            content = path.read_text()
             
-            # Use AST to find all functions and classes
+            # Functions and classes from the cached symbol table
             try:
-                analyzer = CodeAnalyzer(content)
-                for node in ast.walk(analyzer.tree):
-                    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
-                        name = node.name
-                        if not name.startswith('_'):  # Skip private definitions
-                            completions.append(name)
-                            # Add --level options
-                            completions.extend([
-                                f"{name} --level=basic",
-                                f"{name} --level=deep",
-                                f"{name} --level=eli5"
-                            ])
+                for definition in get_parse_cache().symbols(path):
+                    name = definition.name
+                    if not name.startswith('_'):  # Skip private definitions
+                        completions.append(name)
+                        # Add --level options
+                        completions.extend([
+                            f"{name} --level=basic",
+                            f"{name} --level=deep",
+                            f"{name} --level=eli5"
+                        ])
             except SyntaxError:
                 # Fall back to regex for files with syntax errors
+                content = path.read_text()
                 for match in re.finditer(r'(?:def|class)\s+([a-zA-Z_]\w*)', content):
                     name = match.group(1)
                     if not name.startswith('_'):
@@ -301,6 +653,7 @@ def completions_explain(self):
                 self.io.tool_error(f"Error getting completions from {fname}: {e}")
             continue
             
+    completions.append('--all')
     return sorted(set(completions))  # Remove duplicates
 
 # Register the command with completions
@@ -0,0 +1,352 @@
+"""Commands answering questions from the repository's commit index"""
+
+import ast
+import shlex
+from pathlib import Path
+
+from ..commands_registry import CommandsRegistry
+from ..history.commit_index import dir_prefix, HOTSPOT_ORDERS
+from ..history.blame_cache import get_blame_cache, AGE_BUCKETS
+from .timemachine_command import CodeHistorian
+
+# Nodes counted as decision points for the complexity column
+DECISION_NODES = (
+    ast.If, ast.For, ast.AsyncFor, ast.While, ast.Try, ast.ExceptHandler,
+    ast.With, ast.AsyncWith, ast.BoolOp, ast.IfExp, ast.comprehension, ast.Assert,
+)
+
+def _resolve_file(self, target):
+    """Match target against the repo's files by path or stem"""
+    files = self.coder.get_all_relative_files()
+    if target in files:
+        return target, []
+    matches = [f for f in files if target in f or target == Path(f).stem]
+    if len(matches) == 1:
+        return matches[0], []
+    return None, matches
+
+def cmd_cochange(self, args):
+    """Show the files most often changed together with a file
+    Usage: /cochange <file> [--when=PERIOD] [--top=N]
+
+    Over the whole history this reads the co-change matrix of the commit
+    index, a single lookup; with --when the commits in the period are
+    counted instead. Commits touching more than 100 files are ignored,
+    and files no longer in the repository are not listed.
+
+    Examples:
+    /cochange custom_aider/commands/docrag_commands.py
+    /cochange timemachine_command --top=20
+    /cochange history_commands.py --when="last 6 months"
+    """
+    if not self.coder.repo:
+        self.io.tool_error("No git repository found")
+        return
+
+    try:
+        parts = shlex.split(args)
+    except ValueError as e:
+        self.io.tool_error(f"Could not parse arguments: {e}")
+        return
+
+    options = {"when": None, "top": "10"}
+    words = []
+    for part in parts:
+        if part.startswith("--") and "=" in part:
+            name, value = part[2:].split("=", 1)
+            if name not in options:
+                self.io.tool_error(f"Unknown option --{name}")
+                return
+            options[name] = value
+        elif part.startswith("--"):
+            self.io.tool_error(f"Unknown option {part}")
+            return
+        else:
+            words.append(part)
+    if not options["top"].isdigit() or int(options["top"]) < 1:
+        self.io.tool_error("--top expects a positive number")
+        return
+    top = int(options["top"])
+    target = " ".join(words)
+    if not target:
+        self.io.tool_error("Please specify a file. Usage: /cochange <file> [--when=PERIOD] [--top=N]")
+        return
+
+    filepath, candidates = _resolve_file(self, target)
+    if not filepath:
+        if candidates:
+            self.io.tool_error(f"'{target}' matches several files:")
+            for candidate in candidates[:20]:
+                self.io.tool_output(f"  {candidate}")
+        else:
+            self.io.tool_error(f"Could not find any files matching '{target}'")
+        return
+
+    historian = CodeHistorian(self.coder.repo, self.io)
+    if not historian.index:
+        return
+    since = until = None
+    if options["when"]:
+        period = historian.parse_time_period(options["when"])
+        if period is None:
+            self.io.tool_error(f"Could not understand time period '{options['when']}'")
+            return
+        since, until = period
+
+    total = historian.index.change_count(
+        filepath,
+        since=since.timestamp() if since else None,
+        until=until.timestamp() if until else None,
+    )
+    # Only report files that still exist
+    current = set(self.coder.get_all_relative_files())
+    counts = historian.find_related_changes(filepath, since, until, limit=None)
+    related = [(path, count) for path, count in counts.items() if path in current][:top]
+    period = f" ({options['when']})" if options["when"] else ""
+    if not related:
+        self.io.tool_output(f"No files changed together with {filepath}{period} ({total} commits)")
+        return
+
+    width = max(len(path) for path, _ in related)
+    self.io.tool_output(f"\nFiles changed together with {filepath}{period} ({total} commits):\n")
+    for path, count in related:
+        share = f"{count / total:.0%}" if total else "-"
+        self.io.tool_output(f"  {path:<{width}}  {count:>5}  {share:>4}")
+
+def completions_cochange(self):
+    """Provide completions for cochange command"""
+    if not self.coder.repo:
+        return []
+    return ["--when=", "--top="] + self.coder.get_all_relative_files()
+
+def _file_metrics(root, path):
+    """(lines, complexity) of a file in the working tree
+
+    Complexity is 1 plus the number of decision points for Python
+    files, None for other files. Returns (None, None) for missing files.
+    """
+    try:
+        source = (Path(root) / path).read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return None, None
+    lines = source.count("\n") + (not source.endswith("\n") and bool(source))
+    if not path.endswith(".py"):
+        return lines, None
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return lines, None
+    return lines, 1 + sum(isinstance(node, DECISION_NODES) for node in ast.walk(tree))
+
+def cmd_hotspots(self, args):
+    """Rank files or directories by how much they change
+    Usage: /hotspots [path] [--when=PERIOD] [--by=file|dir] [--depth=N]
+                     [--sort=commits|churn|authors|fixes] [--top=N] [--size]
+
+    For each file (or directory) changed in the period, shows the number
+    of commits, lines added and removed, distinct authors and bug fix
+    commits, ranked by --sort. Everything is aggregated inside the commit
+    index, so this stays interactive on very long histories.
+
+    Options:
+        --when=PERIOD   Same periods as /timemachine ("last 6 months", "after v1.2")
+        --by=dir        Group by directory, --depth levels deep (default: one
+                        level below path)
+        --size          Add current line count and, for Python, complexity
+
+    Examples:
+    /hotspots --when="last 6 months"
+    /hotspots custom_aider --by=dir --sort=churn
+    /hotspots src/api --sort=fixes --size
+    """
+    if not self.coder.repo:
+        self.io.tool_error("No git repository found")
+        return
+
+    try:
+        words = shlex.split(args)
+    except ValueError as e:
+        self.io.tool_error(f"Could not parse arguments: {e}")
+        return
+
+    options = {"when": None, "by": "file", "depth": None, "sort": "commits", "top": "20"}
+    show_size = False
+    prefix = ""
+    for word in words:
+        if word == "--size":
+            show_size = True
+        elif word.startswith("--") and "=" in word:
+            name, value = word[2:].split("=", 1)
+            if name not in options:
+                self.io.tool_error(f"Unknown option --{name}")
+                return
+            options[name] = value
+        elif word.startswith("--"):
+            self.io.tool_error(f"Unknown option {word}")
+            return
+        else:
+            prefix = word.strip("/")
+
+    if options["sort"] not in HOTSPOT_ORDERS:
+        self.io.tool_error(f"--sort must be one of: {', '.join(HOTSPOT_ORDERS)}")
+        return
+    if options["by"] not in ("file", "dir"):
+        self.io.tool_error("--by must be 'file' or 'dir'")
+        return
+    for name in ("depth", "top"):
+        if options[name] is not None and (not options[name].isdigit() or int(options[name]) < 1):
+            self.io.tool_error(f"--{name} expects a positive number")
+            return
+    top = int(options["top"])
+
+    depth = None
+    if options["depth"]:
+        depth = int(options["depth"])
+    elif options["by"] == "dir":
+        depth = len(prefix.split("/")) + 1 if prefix else 1
+
+    historian = CodeHistorian(self.coder.repo, self.io)
+    if not historian.index:
+        return
+    since = until = None
+    if options["when"]:
+        period = historian.parse_time_period(options["when"])
+        if period is None:
+            self.io.tool_error(f"Could not understand time period '{options['when']}'")
+            return
+        since, until = (date.timestamp() if date else None for date in period)
+
+    # Only report files that still exist, or directories containing them
+    files = self.coder.get_all_relative_files()
+    current = set(files)
+    if prefix and prefix not in current:
+        # A directory; match whole path components
+        prefix += "/"
+    if depth:
+        current = {dir_prefix(path, depth) for path in files}
+
+    rows = []
+    for row in historian.index.hotspots(since, until, prefix, depth, options["sort"]):
+        if row["path"] in current:
+            rows.append(row)
+            if len(rows) >= top:
+                break
+    if not rows:
+        self.io.tool_output("No changes found for the specified criteria.")
+        return
+
+    if show_size:
+        root = self.coder.repo.root
+        for row in rows:
+            if depth:
+                members = [f for f in files if dir_prefix(f, depth) == row["path"]]
+                metrics = [_file_metrics(root, f) for f in members]
+                row["lines"] = sum(lines or 0 for lines, _ in metrics)
+                row["complexity"] = sum(c or 0 for _, c in metrics) or None
+            else:
+                row["lines"], row["complexity"] = _file_metrics(root, row["path"])
+
+    columns = [("commits", "Commits"), ("added", "Added"), ("deleted", "Removed"),
+               ("authors", "Authors"), ("fixes", "Fixes")]
+    if show_size:
+        columns += [("lines", "Lines"), ("complexity", "Complexity")]
+
+    def cell(value):
+        return "-" if value is None else str(value)
+
+    width = max(len(row["path"]) for row in rows + [{"path": "Path"}])
+    widths = [max(len(title), *(len(cell(row[key])) for row in rows)) for key, title in columns]
+    header = f"{'#':>3}  {'Path':<{width}}  " + "  ".join(
+        f"{title:>{w}}" for (_, title), w in zip(columns, widths))
+
+    scope = f" under {prefix.rstrip('/')}" if prefix else ""
+    period = f" ({options['when']})" if options["when"] else ""
+    self.io.tool_output(f"\nHotspots{scope}{period}, by {options['sort']}:\n")
+    self.io.tool_output(header)
+    self.io.tool_output("-" * len(header))
+    for rank, row in enumerate(rows, 1):
+        cells = "  ".join(f"{cell(row[key]):>{w}}" for (key, _), w in zip(columns, widths))
+        self.io.tool_output(f"{rank:>3}  {row['path']:<{width}}  {cells}")
+
+def completions_hotspots(self):
+    """Provide completions for hotspots command"""
+    return [
+        "--when=", "--by=file", "--by=dir", "--depth=", "--top=", "--size",
+        *(f"--sort={order}" for order in HOTSPOT_ORDERS),
+    ]
+
+def cmd_owners(self, args):
+    """Show who owns the lines of a file or directory
+    Usage: /owners [path] [--top=N]
+
+    Counts the lines at HEAD last changed by each author (git blame) and
+    how old they are. Blame results are cached per file blob, so only
+    files changed since the last run are blamed again, in parallel.
+
+    Examples:
+    /owners
+    /owners custom_aider/commands
+    /owners custom_aider/history/gitlog.py --top=5
+    """
+    if not self.coder.repo:
+        self.io.tool_error("No git repository found")
+        return
+
+    top = 20
+    prefix = ""
+    for part in args.split():
+        if part.startswith("--top="):
+            value = part.split("=", 1)[1]
+            if not value.isdigit() or int(value) < 1:
+                self.io.tool_error("--top expects a positive number")
+                return
+            top = int(value)
+        else:
+            prefix = part.strip("/")
+
+    try:
+        blame = get_blame_cache(self.coder.repo.root)
+        self.io.tool_output("Updating blame cache...")
+        blamed = blame.refresh(prefix)
+        rows = blame.ownership(prefix)
+    except Exception as e:
+        self.io.tool_error(f"Error computing ownership: {e}")
+        return
+
+    if not rows:
+        self.io.tool_error(f"No tracked files found under '{prefix or '.'}'")
+        return
+
+    total = sum(lines for _, lines, _ in rows)
+    scope = prefix or "repository"
+    self.io.tool_output(
+        f"\nLine ownership of {scope} at HEAD: {total} lines, {len(rows)} authors"
+        f" ({blamed} files blamed)\n"
+    )
+
+    shown = rows[:top]
+    width = max(len("Author"), *(len(author) for author, _, _ in shown))
+    titles = [title for _, title in AGE_BUCKETS]
+    header = f"{'Author':<{width}}  {'Lines':>7}  {'Share':>5}  " + "  ".join(
+        f"{title:>11}" for title in titles)
+    self.io.tool_output(header)
+    self.io.tool_output("-" * len(header))
+    for author, lines, ages in shown:
+        cells = "  ".join(f"{age:>11}" for age in ages)
+        self.io.tool_output(f"{author:<{width}}  {lines:>7}  {lines / total:>5.0%}  {cells}")
+    if len(rows) > top:
+        rest = sum(lines for _, lines, _ in rows[top:])
+        self.io.tool_output(f"... {len(rows) - top} more authors with {rest} lines")
+
+def completions_owners(self):
+    """Provide completions for owners command"""
+    if not self.coder.repo:
+        return []
+    files = self.coder.get_all_relative_files()
+    dirs = {str(Path(f).parent) for f in files if "/" in f}
+    return sorted(dirs) + files
+
+# Register commands
+CommandsRegistry.register("cochange", cmd_cochange, completions_cochange)
+CommandsRegistry.register("hotspots", cmd_hotspots, completions_hotspots)
+CommandsRegistry.register("owners", cmd_owners, completions_owners)
@@ -1,9 +1,44 @@
 """Command for intelligent exploration of code history"""
 
+import os
 import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from pathlib import Path
 from ..commands_registry import CommandsRegistry
+from ..history.gitlog import iter_log
+from ..history.records import HistoryRecord
+from ..history.blame_cache import get_blame_cache
+from ..history.commit_index import get_commit_index
+from ..history.completion import get_path_index
+from ..history.classify import FEATURE, BUGFIX, TEST, classify_message
+
+# Number of co-changed files kept per analyzed file
+RELATED_LIMIT = 10
+
+# Default cap on the number of files analyzed by one command
+MAX_FILES = 20
+
+ANALYSIS_WORKERS = min(8, os.cpu_count() or 1)
+
+TIME_PERIODS = [
+    'last 3 months',
+    'last 6 months',
+    'last year',
+    'last 2 years'
+]
+
+OPTIONS = ['--when', '--limit=', '--max-files=', '--diffs']
+
+# Longest diff shown per change with --diffs
+DIFF_MAX_LINES = 40
+
+# Entries listed in the "Symbol Changes" section
+SYMBOL_CHANGES_SHOWN = 15
+
+# "#123", "bug #123", "issue 123", "PR #123"
+ISSUE_REF = re.compile(r'(?:(?:bug|issue|pr|fix(?:es)?)\s*)?#(\d+)|(?:bug|issue|pr)\s+(\d+)', re.IGNORECASE)
 
 class CodeHistorian:
     """Analyzes and presents code history intelligently"""
@@ -11,132 +46,252 @@ class CodeHistorian:
     def __init__(self, repo, io):
         self.repo = repo
         self.io = io
+        self.root = repo.repo.working_tree_dir
+        self.index = self._open_index()
         
+    def _open_index(self):
+        """Open the repository's commit index, bringing it up to date"""
+        try:
+            return get_commit_index(self.root)
+        except Exception as e:
+            self.io.tool_error(f"Commit index unavailable, reading git log instead: {e}")
+            return None
+            
     def parse_time_period(self, time_spec):
-        """Parse time specification into a start date"""
+        """Parse time specification into a (since, until) date range
+        
+        Either bound may be None. Returns None if the specification is
+        not understood or its reference cannot be found.
+        """
         if not time_spec:
             return None
+        time_spec = time_spec.strip().strip('"\'')
             
         # Handle relative time periods
-        if match := re.match(r'last\s+(\d+)\s+(day|month|year)s?', time_spec.lower()):
+        if match := re.match(r'last\s+(\d+\s+)?(day|week|month|year)s?$', time_spec.lower()):
             number, unit = match.groups()
-            number = int(number)
+            number = int(number) if number else 1
             # Use UTC for consistency with git timestamps
             now = datetime.now().replace(tzinfo=None)
-            
-            if unit == 'day':
-                return now - timedelta(days=number)
-            elif unit == 'month':
-                return now - timedelta(days=number * 30)
-            elif unit == 'year':
-                return now - timedelta(days=number * 365)
+            days = {'day': 1, 'week': 7, 'month': 30, 'year': 365}[unit]
+            return now - timedelta(days=number * days), None
                 
         # Handle "before/after" references
-        if match := re.match(r'(before|after)\s+(.+)', time_spec.lower()):
+        if match := re.match(r'(before|after)\s+(.+)', time_spec, re.IGNORECASE):
             direction, reference = match.groups()
-            
-            # Look for commit with reference in message
-            for commit in self.repo.repo.iter_commits():
-                if reference.lower() in commit.message.lower():
-                    if direction == 'before':
-                        return commit.authored_datetime
-                    else:
-                        return commit.authored_datetime
+            reference = reference.strip().strip('"\'')
+            found = self.find_reference(reference)
+            if not found:
+                self.io.tool_error(f"No commit, tag or message matches '{reference}'")
+                return None
+            sha, date = found
+            self.io.tool_output(f"Using {sha[:8]} ({date.strftime('%Y-%m-%d')}) for '{reference}'")
+            # The referenced commit itself belongs to neither side
+            if direction.lower() == 'before':
+                return None, date - timedelta(seconds=1)
+            return date + timedelta(seconds=1), None
                         
         return None
         
-    def get_file_history(self, filepath, since_date=None):
-        """Get commit history for a specific file"""
+    def _git(self, *args):
+        return subprocess.run(["git", *args], cwd=self.root, capture_output=True, text=True)
+        
+    def _resolve_ref(self, reference):
+        """Commit sha for a tag, branch or commit id, or None"""
+        result = self._git("rev-parse", "--verify", "--quiet", f"{reference}^{{commit}}")
+        return result.stdout.strip() if result.returncode == 0 else None
+        
+    def find_reference(self, reference):
+        """Find the commit a before/after reference points at
+        
+        Tags, branches and commit ids are resolved by git. Anything else
+        is searched for in commit messages, newest match first; issue
+        numbers ("#123", "bug #123") only match that exact number.
+        Returns (sha, date) or None.
+        """
+        pattern = None
+        if match := ISSUE_REF.fullmatch(reference):
+            number = match.group(1) or match.group(2)
+            reference = f"#{number}"
+            pattern = re.compile(rf"#{number}(?!\d)")
+        elif sha := self._resolve_ref(reference):
+            timestamp = self.index.commit_time(sha) if self.index else None
+            if timestamp is None:
+                timestamp = int(self._git("show", "-s", "--format=%at", sha).stdout.strip())
+            return sha, datetime.fromtimestamp(timestamp)
+            
+        if self.index:
+            found = self.index.find_message(reference, pattern)
+            return (found[0], datetime.fromtimestamp(found[1])) if found else None
+            
+        # Let git filter the messages
+        cmd = ["log", "-1", "-i", "--format=%H %at"]
+        if pattern:
+            cmd += ["-E", f"--grep=#{number}([^0-9]|$)"]
+        else:
+            cmd += ["-F", f"--grep={reference}"]
+        result = self._git(*cmd)
+        if result.returncode != 0 or not result.stdout.strip():
+            return None
+        sha, timestamp = result.stdout.split()
+        return sha, datetime.fromtimestamp(int(timestamp))
+        
+    def get_file_history(self, filepath, since_date=None, until_date=None, limit=None,
+                         related=None):
+        """Get commit history for a specific file as HistoryRecords
+        
+        Answered from the commit index when available. Otherwise streams a
+        single git log pass; if a related dict is given, the files changed
+        by each of those commits are counted into it on the way, so no
+        per-commit file lists are kept. With a limit only the latest
+        changes are returned.
+        """
         history = []
+        since = since_date.timestamp() if since_date else None
+        until = until_date.timestamp() if until_date else None
+        if self.index:
+            for sha, timestamp, author, summary, category, status, added, deleted in \
+                    self.index.file_history(filepath, since=since, until=until, limit=limit):
+                history.append(HistoryRecord(
+                    sha, timestamp, author, summary, category,
+                    change=status, added=added, deleted=deleted
+                ))
+            return history
+            
         try:
-            commits = self.repo.repo.iter_commits(paths=filepath)
-            for commit in commits:
-                # Convert to naive datetime for comparison
-                commit_date = commit.authored_datetime.replace(tzinfo=None)
-                if since_date and commit_date < since_date:
+            extra_args = [f"--until={until_date.isoformat()}"] if until_date else None
+            for entry in iter_log(self.root, paths=[filepath], since=since_date,
+                                  extra_args=extra_args):
+                # git filters by committer date; apply the range to author dates
+                if (since and entry.timestamp < since) or \
+                        (until and entry.timestamp > until):
                     continue
                     
-                # Get diff for this file in this commit
-                diff = commit.diff(commit.parents[0] if commit.parents else None)
-                file_diff = next((d for d in diff if d.a_path == filepath or d.b_path == filepath), None)
-                
-                if file_diff:
-                    history.append({
-                        'commit': commit,
-                        'diff': file_diff,
-                        'date': commit.authored_datetime,
-                        'author': commit.author.name,
-                        'message': commit.message.strip()
-                    })
+                change = entry.change_for(filepath)
+                if change:
+                    history.append(HistoryRecord(
+                        entry.sha, entry.timestamp, entry.author, entry.summary,
+                        classify_message(entry.message),
+                        change=change.status, added=change.added, deleted=change.deleted
+                    ))
+                    if related is not None:
+                        for other in entry.files:
+                            if other.path != filepath:
+                                related[other.path] = related.get(other.path, 0) + 1
+                    if limit and len(history) >= limit:
+                        break
         except Exception as e:
             self.io.tool_error(f"Error getting history: {e}")
             
         return history
         
-    def find_related_changes(self, filepath, history):
-        """Find related changes in other files"""
-        related = {}
-        base_name = Path(filepath).stem
+    def find_related_changes(self, filepath, since_date=None, until_date=None,
+                             limit=RELATED_LIMIT, counts=None):
+        """Find the files most often changed in the same commits
         
-        for entry in history:
-            commit = entry['commit']
-            
-            # Look for related files changed in same commits
-            for diff in commit.diff(commit.parents[0] if commit.parents else None):
-                other_path = diff.a_path or diff.b_path
-                if other_path != filepath:
-                    # Check if file looks related
-                    other_name = Path(other_path).stem
-                    if (base_name in other_name or 
-                        other_name in base_name or
-                        'test' in other_path.lower()):
-                        related[other_path] = related.get(other_path, 0) + 1
+        Without the commit index, counts must hold the co-change counts
+        gathered by get_file_history.
+        """
+        if self.index:
+            if not since_date and not until_date:
+                # Whole history: read straight from the co-change matrix
+                return dict(self.index.top_cochanges(filepath, limit))
+            counts = self.index.cochange_counts(
+                filepath,
+                since=since_date.timestamp() if since_date else None,
+                until=until_date.timestamp() if until_date else None,
+            )
                         
-        return related
+        top = sorted((counts or {}).items(), key=lambda x: (-x[1], x[0]))[:limit]
+        return dict(top)
         
-    def analyze_changes(self, filepath, since_date=None):
+    def analyze_changes(self, filepath, since_date=None, until_date=None, limit=None):
         """Analyze evolution of code in a file"""
-        history = self.get_file_history(filepath, since_date)
+        # Fetch one extra entry to tell whether the history was cut off
+        counts = None if self.index else {}
+        history = self.get_file_history(
+            filepath, since_date, until_date, limit + 1 if limit else None, counts
+        )
         if not history:
             return None
+        truncated = bool(limit) and len(history) > limit
+        if truncated:
+            history = history[:limit]
             
         # Find related files
-        related = self.find_related_changes(filepath, history)
+        related = self.find_related_changes(filepath, since_date, until_date, counts=counts)
+        return {
+            'path': filepath,
+            'history': history,
+            'truncated': truncated,
+            'related_files': related,
+            'ownership': self.get_ownership(filepath)
+        }
         
-        # Group changes by type
-        features = []
-        bugs = []
-        tests = []
-        refactors = []
-        other = []
+    def get_ownership(self, filepath):
+        """Surviving lines per author at HEAD, from the blame cache"""
+        try:
+            blame = get_blame_cache(self.root)
+            blame.refresh(filepath)
+            return blame.file_ownership(filepath)
+        except Exception as e:
+            self.io.tool_error(f"Could not blame {filepath}: {e}")
+            return {}
         
-        for entry in history:
-            msg = entry['message'].lower()
-            if 'feat' in msg or 'add' in msg or 'new' in msg:
-                features.append(entry)
-            elif 'fix' in msg or 'bug' in msg or 'issue' in msg:
-                bugs.append(entry)
-            elif 'test' in msg:
-                tests.append(entry)
-            elif 'refactor' in msg or 'clean' in msg:
-                refactors.append(entry)
-            else:
-                other.append(entry)
-                
+    def find_symbols(self, target):
+        """Indexed Python functions and classes matching a dotted target"""
+        if not self.index:
+            return []
+        return self.index.find_symbols(target)
+        
+    def analyze_symbol(self, filepath, name, since_date=None, until_date=None, limit=None):
+        """Analyze the evolution of one function or class"""
+        rows = self.index.symbol_history(
+            filepath, name,
+            since=since_date.timestamp() if since_date else None,
+            until=until_date.timestamp() if until_date else None,
+            limit=limit + 1 if limit else None,
+        )
+        if not rows:
+            return None
+        truncated = bool(limit) and len(rows) > limit
+        if truncated:
+            rows = rows[:limit]
+            
+        history = []
+        related = {}
+        for sha, timestamp, author, summary, category, change, start_line, end_line in rows:
+            history.append(HistoryRecord(
+                sha, timestamp, author, summary, category,
+                change=change, lines=(start_line, end_line)
+            ))
+            for other_path in self.index.commit_files(sha):
+                if other_path != filepath:
+                    related[other_path] = related.get(other_path, 0) + 1
+                    
         return {
+            'path': filepath,
+            'symbol': name,
             'history': history,
-            'related_files': related,
-            'features': features,
-            'bugs': bugs, 
-            'tests': tests,
-            'refactors': refactors,
-            'other': other
+            'truncated': truncated,
+            'related_files': related
         }
         
-    def format_results(self, results, filepath):
-        """Format analysis results into readable output"""
+    def get_diff(self, record, filepath):
+        """Patch a commit made to one file, loaded from git on demand"""
+        result = self._git(
+            "show", "--format=", "--no-color", "--no-ext-diff", record.sha, "--", filepath
+        )
+        return result.stdout if result.returncode == 0 else ""
+        
+    def format_results(self, results, filepath, show_diffs=False):
+        """Format analysis results into readable output
+        
+        Changes are grouped by the category stored on each record. With
+        show_diffs, each bug fix is followed by its (truncated) patch.
+        """
         if not results:
-            return "No history found for the specified criteria."
+            return f"\nNo history found for {filepath} for the specified criteria."
             
         output = []
         
@@ -147,36 +302,44 @@ class CodeHistorian:
         # Timeline summary
         output.append("\nTimeline Summary:")
         output.append("-" * 20)
-        first = results['history'][-1]['date']
-        last = results['history'][0]['date']
+        first = results['history'][-1].date
+        last = results['history'][0].date
         total = len(results['history'])
         output.append(f"First change: {first.strftime('%Y-%m-%d')}")
         output.append(f"Latest change: {last.strftime('%Y-%m-%d')}")
-        output.append(f"Total changes: {total}")
-        
-        # Feature development
-        if results['features']:
-            output.append("\nFeature Development:")
-            output.append("-" * 20)
-            for entry in results['features']:
-                date = entry['date'].strftime('%Y-%m-%d')
-                output.append(f"{date} - {entry['message'].split('\n')[0]}")
-                
-        # Bug fixes
-        if results['bugs']:
-            output.append("\nBug Fixes:")
+        if results.get('truncated'):
+            output.append(f"Showing the latest {total} changes")
+        else:
+            output.append(f"Total changes: {total}")
+            
+        # Symbol timeline
+        if results.get('symbol'):
+            output.append("\nSymbol Changes:")
             output.append("-" * 20)
-            for entry in results['bugs']:
-                date = entry['date'].strftime('%Y-%m-%d')
-                output.append(f"{date} - {entry['message'].split('\n')[0]}")
-                
-        # Test changes
-        if results['tests']:
-            output.append("\nTest Development:")
+            for entry in results['history'][:SYMBOL_CHANGES_SHOWN]:
+                date = entry.date.strftime('%Y-%m-%d')
+                start, end = entry.lines
+                output.append(
+                    f"{date} {entry.sha[:8]} {entry.change:<8} "
+                    f"lines {start}-{end} - {entry.summary}"
+                )
+        
+        sections = [
+            (FEATURE, "Feature Development"),
+            (BUGFIX, "Bug Fixes"),
+            (TEST, "Test Development"),
+        ]
+        for category, title in sections:
+            entries = [entry for entry in results['history'] if entry.category == category]
+            if not entries:
+                continue
+            output.append(f"\n{title}:")
             output.append("-" * 20)
-            for entry in results['tests']:
-                date = entry['date'].strftime('%Y-%m-%d')
-                output.append(f"{date} - {entry['message'].split('\n')[0]}")
+            for entry in entries:
+                date = entry.date.strftime('%Y-%m-%d')
+                output.append(f"{date} - {entry.summary}")
+                if show_diffs and category == BUGFIX:
+                    output.append(self._format_diff(entry, results['path']))
                 
         # Related files
         if results['related_files']:
@@ -186,22 +349,37 @@ class CodeHistorian:
                                     key=lambda x: x[1], reverse=True)[:5]:
                 output.append(f"{file} ({count} times)")
                 
-        # Contributors
+        # Contributors, with the lines of theirs that survive at HEAD
         contributors = {}
         for entry in results['history']:
-            contributors[entry['author']] = contributors.get(entry['author'], 0) + 1
+            contributors[entry.author] = contributors.get(entry.author, 0) + 1
+        ownership = results.get('ownership') or {}
+        total_lines = sum(ownership.values())
             
         output.append("\nContributors:")
         output.append("-" * 20)
-        for author, count in sorted(contributors.items(), 
-                                  key=lambda x: x[1], reverse=True):
-            output.append(f"{author}: {count} changes")
+        authors = set(contributors) | set(ownership)
+        for author in sorted(authors, key=lambda a: (-ownership.get(a, 0),
+                                                     -contributors.get(a, 0), a)):
+            line = f"{author}: {contributors.get(author, 0)} changes"
+            if total_lines:
+                lines = ownership.get(author, 0)
+                line += f", {lines} lines ({lines / total_lines:.0%})"
+            output.append(line)
             
         return "\n".join(output)
+        
+    def _format_diff(self, entry, filepath):
+        lines = self.get_diff(entry, filepath).splitlines()
+        if len(lines) > DIFF_MAX_LINES:
+            hidden = len(lines) - DIFF_MAX_LINES
+            lines = lines[:DIFF_MAX_LINES] + [f"... ({hidden} more lines)"]
+        return "\n".join(f"    {line}" for line in lines)
 
 def cmd_timemachine(self, args):
     """Intelligent exploration of code history
-    Usage: /timemachine <function/feature> [--when time_period]
+    Usage: /timemachine <file/function/class> [--when time_period] [--limit=N] [--max-files=N]
+                        [--diffs]
     
     Beyond simple git history, shows:
     - When and why code evolved
@@ -211,10 +389,22 @@ def cmd_timemachine(self, args):
     - Contributors and their changes
     - Test changes that accompanied code changes
     
+    Targets are matched against file paths first. If no file matches,
+    Python functions and classes are looked up in the history index by
+    name (``init``, ``Database.init``, ``database.Database.init``) and
+    their own changes are reported with line ranges.
+    
+    Matching files are analyzed concurrently and each report is shown as
+    soon as it is ready. --max-files caps how many files are analyzed
+    (default 20) and --limit how many of the latest changes are
+    considered per file. --diffs shows the patch of each bug fix.
+    
     Examples:
     /timemachine login_flow --when "last 3 months"
     /timemachine payment.py --when "before refactor"
     /timemachine database.init --when "after bug #123"
+    /timemachine parser.py --when "before v1.2"
+    /timemachine api --max-files=50 --limit=30
     
     Like having a historian explain how your code evolved.
     """
@@ -227,6 +417,18 @@ def cmd_timemachine(self, args):
         return
         
     # Parse arguments
+    options = {'limit': None, 'max-files': MAX_FILES}
+    for name in options:
+        if match := re.search(rf'--{name}=(\S*)', args):
+            if not match.group(1).isdigit() or int(match.group(1)) < 1:
+                self.io.tool_error(f"--{name} expects a positive number")
+                return
+            options[name] = int(match.group(1))
+            args = args[:match.start()] + args[match.end():]
+    limit, max_files = options['limit'], options['max-files']
+    show_diffs = bool(re.search(r'--diffs\b', args))
+    args = re.sub(r'--diffs\b', '', args)
+    
     parts = args.split('--when')
     target = parts[0].strip()
     when = parts[1].strip() if len(parts) > 1 else None
@@ -235,60 +437,131 @@ def cmd_timemachine(self, args):
     historian = CodeHistorian(self.coder.repo, self.io)
     
     # Get date range if specified
-    since_date = historian.parse_time_period(when) if when else None
+    since_date = until_date = None
+    if when:
+        period = historian.parse_time_period(when)
+        if period is None:
+            self.io.tool_error(
+                f"Could not understand time period '{when}'. Use e.g. 'last 3 months', "
+                "'before <tag|commit|message>' or 'after bug #123'."
+            )
+            return
+        since_date, until_date = period
     
-    # Find target file/path
-    found = False
-    for fname in self.coder.get_all_relative_files():
+    # Find target files, as ("file", path) matches
+    files = [
+        fname for fname in self.coder.get_all_relative_files()
         if (target in fname or
             target == Path(fname).stem or 
-            target in Path(fname).stem):
-            
-            self.io.tool_output(f"\nAnalyzing history of {fname}...")
-            results = historian.analyze_changes(fname, since_date)
-            output = historian.format_results(results, fname)
-            self.io.tool_output(output)
-            found = True
+            target in Path(fname).stem)
+    ]
+    exact = [fname for fname in files if target in (fname, Path(fname).stem)]
+    
+    # Functions and classes too, unless the target names a file exactly;
+    # a substring match such as "init" in "pkg/__init__.py" is not enough
+    symbols = []
+    if '.' in target or not exact:
+        symbols = [("symbol", (path, name)) for path, name, _ in historian.find_symbols(target)]
+    matches = (
+        [("file", fname) for fname in exact] + symbols +
+        [("file", fname) for fname in files if fname not in exact]
+    )
+    
+    def label(match):
+        kind, value = match
+        return value if kind == "file" else ":".join(value)
+        
+    def analyze(match):
+        kind, value = match
+        if kind == "file":
+            results = historian.analyze_changes(value, since_date, until_date, limit)
+        else:
+            results = historian.analyze_symbol(*value, since_date, until_date, limit)
+        return historian.format_results(results, label(match), show_diffs)
+        
+    kinds = {kind for kind, _ in matches}
+    kind = kinds.pop() if len(kinds) == 1 else "target"
             
-    if not found:
+    if not matches:
         self.io.tool_error(
-            f"Could not find any files matching '{target}'. "
-            "Try using a more specific path or filename."
+            f"Could not find any files or symbols matching '{target}'. "
+            "Try using a more specific path, filename or symbol name."
         )
+        return
+        
+    if len(matches) > max_files:
+        self.io.tool_output(
+            f"{len(matches)} {kind}s match '{target}'; analyzing the first {max_files}. "
+            "Use a more specific target or --max-files=N to see more."
+        )
+        matches = matches[:max_files]
+    else:
+        self.io.tool_output(f"Analyzing history of {len(matches)} {kind}(s)...")
+        
+    # Show each report as soon as its analysis finishes
+    with ThreadPoolExecutor(max_workers=min(ANALYSIS_WORKERS, len(matches))) as executor:
+        futures = {executor.submit(analyze, match): match for match in matches}
+        try:
+            for future in as_completed(futures):
+                match = futures[future]
+                try:
+                    self.io.tool_output(future.result())
+                except Exception as e:
+                    self.io.tool_error(f"Error analyzing {label(match)}: {e}")
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            self.io.tool_error("Interrupted; remaining files were skipped")
 
 def completions_timemachine(self):
-    """Provide completions for timemachine command"""
-    # Get list of files
-    files = []
-    if self.coder.repo:
-        files = self.coder.get_all_relative_files()
+    """Provide completions for timemachine command
+    
+    Only the options; targets are completed by completions_raw_timemachine.
+    """
+    return OPTIONS + [f'--when "{period}"' for period in TIME_PERIODS]
+
+def completions_raw_timemachine(self, document, complete_event):
+    """Complete targets by prefix, then options and time periods
+    
+    Paths and stems come from a sorted prefix index that is rebuilt only
+    when the repository changes, so each keystroke yields just the
+    matches for what was typed.
+    """
+    from prompt_toolkit.completion import Completion
+    
+    if not self.coder.repo:
+        return
         
-    # Add common time periods
-    time_periods = [
-        'last 3 months',
-        'last 6 months', 
-        'last year',
-        'last 2 years'
-    ]
+    text = document.text_before_cursor
+    parts = text.split(maxsplit=1)
+    args = parts[1] if len(parts) > 1 else ""
     
-    completions = []
+    # Time periods, only once --when has been typed
+    if match := re.search(r'--when\s+(.*)$', args):
+        partial = match.group(1)
+        needle = partial.strip('"\'').lower()
+        for period in TIME_PERIODS:
+            if period.startswith(needle):
+                yield Completion(f'"{period}"', start_position=-len(partial))
+        return
+        
+    words = args.split()
+    partial = "" if not words or text[-1].isspace() else words[-1]
     
-    # Add file completions
-    for f in files:
-        name = f
-        stem = Path(f).stem
-        completions.append(name)
-        completions.append(stem)
-        # Add with time periods
-        for period in time_periods:
-            completions.append(f"{name} --when {period}")
-            completions.append(f"{stem} --when {period}")
-            
-    return sorted(set(completions))
+    if partial.startswith('-') or (words and not partial):
+        for option in OPTIONS:
+            if option.startswith(partial):
+                yield Completion(option, start_position=-len(partial))
+        return
+        
+    index = get_path_index(self.coder.repo.root, self.coder.get_all_relative_files)
+    for value in index.complete(partial):
+        yield Completion(value, start_position=-len(partial))
 
 # Register command
 CommandsRegistry.register(
     "timemachine",
     cmd_timemachine,
-    completions_timemachine
+    completions_timemachine,
+    completions_raw_timemachine
 )
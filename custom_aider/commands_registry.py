@@ -8,8 +8,15 @@ class CommandsRegistry:
     _descriptions: Dict[str, str] = {}
     
     @classmethod
-    def register(cls, name: str, handler: Callable, completions: Optional[Callable] = None) -> None:
-        """Register a command handler and optional completions"""
+    def register(cls, name: str, handler: Callable, completions: Optional[Callable] = None,
+                 raw_completions: Optional[Callable] = None) -> None:
+        """Register a command handler and optional completions
+        
+        raw_completions, if given, is installed as completions_raw_<name>:
+        aider calls it with the prompt_toolkit document and complete event
+        and it yields Completion objects itself, taking precedence over
+        the plain completions list.
+        """
         print(f"Registering command: {name}")  # Debug print
         
         if not callable(handler):
@@ -28,6 +35,12 @@ class CommandsRegistry:
                 raise TypeError("Completions must be callable")
             cls._completions[f"completions_{name}"] = completions
             print(f"Registered completions for {name}")  # Debug print
+            
+        if raw_completions:
+            if not callable(raw_completions):
+                raise TypeError("Raw completions must be callable")
+            cls._completions[f"completions_raw_{name}"] = raw_completions
+            print(f"Registered raw completions for {name}")  # Debug print
 
     @classmethod
     def install_commands(cls, commands_instance) -> None:
@@ -73,6 +86,7 @@ class CommandsRegistry:
         """Remove a registered command"""
         cls._commands.pop(f"cmd_{name}", None)
         cls._completions.pop(f"completions_{name}", None)
+        cls._completions.pop(f"completions_raw_{name}", None)
         cls._descriptions.pop(name, None)
 
     @classmethod
@@ -0,0 +1,70 @@
+"""Shared Jinja environment for the HTML generating commands
+
+Templates are loaded from ``gui/templates`` through one Environment, so
+each is compiled once per process and recompiled only when its file
+changes; compiled bytecode is also kept under
+``~/.extn_aider/cache/jinja`` so a fresh process skips compilation. The
+CSS and JavaScript files inlined into pages are read once and cached in
+memory until their mtime changes.
+"""
+
+import os
+import threading
+from pathlib import Path
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+TEMPLATES_DIR = Path(__file__).parent / 'templates'
+BYTECODE_CACHE_DIR = Path.home() / '.extn_aider' / 'cache' / 'jinja'
+
+_environment = None
+_assets = {}
+_lock = threading.Lock()
+
+
+def get_environment():
+    """Return the shared Environment, creating it on first use"""
+    global _environment
+    with _lock:
+        if _environment is None:
+            try:
+                BYTECODE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                bytecode_cache = FileSystemBytecodeCache(str(BYTECODE_CACHE_DIR))
+            except OSError:
+                bytecode_cache = None
+            _environment = Environment(
+                loader=FileSystemLoader(str(TEMPLATES_DIR)),
+                bytecode_cache=bytecode_cache,
+                auto_reload=True,
+            )
+    return _environment
+
+
+def get_template(name):
+    """Compiled template by path relative to the templates directory"""
+    return get_environment().get_template(name)
+
+
+def read_asset(name):
+    """Text of a static file under the templates directory, cached by mtime"""
+    path = TEMPLATES_DIR / name
+    mtime = os.stat(path).st_mtime_ns
+    with _lock:
+        cached = _assets.get(name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    text = path.read_text(encoding='utf-8')
+    with _lock:
+        _assets[name] = (mtime, text)
+    return text
+
+
+def render_page(template_dir, template_name='base_template.html', **context):
+    """Render a template from template_dir with its style.css and
+    script.js passed in as styles and scripts"""
+    template = get_template(f'{template_dir}/{template_name}')
+    return template.render(
+        styles=read_asset(f'{template_dir}/style.css'),
+        scripts=read_asset(f'{template_dir}/script.js'),
+        **context
+    )
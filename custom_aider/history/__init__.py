@@ -0,0 +1,3 @@
+"""
+Git history extraction and indexing used by the history commands
+"""
@@ -0,0 +1,210 @@
+"""Cached, incrementally refreshed line ownership from git blame
+
+For every file at HEAD, the number of surviving lines per author and
+per month they were written is stored in SQLite under
+``<repo>/.extn_aider/history/blame.db`` together with the blob sha the
+counts were computed from. refresh() lists HEAD's tree once with
+``git ls-tree`` and only re-blames files whose blob changed since the
+last run, running the blames in parallel.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+BLAME_WORKERS = min(8, os.cpu_count() or 1)
+
+# Larger files (generated or vendored) are not blamed
+MAX_BLAME_BYTES = 1 << 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, blob TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS ownership (
+    path TEXT NOT NULL,
+    author TEXT NOT NULL,
+    month INTEGER NOT NULL,
+    lines INTEGER NOT NULL,
+    PRIMARY KEY (path, author, month)
+) WITHOUT ROWID;
+"""
+
+# Commit header of a porcelain record, in SHA-1 or SHA-256 repositories
+COMMIT_SHA = re.compile(r"[0-9a-f]{40}|[0-9a-f]{64}")
+
+# Age buckets reported by ownership(), as upper bounds in months
+AGE_BUCKETS = ((3, "< 3 months"), (12, "3-12 months"), (None, "> 1 year"))
+
+
+def month_index(timestamp):
+    """Months since year 0 for a unix timestamp, in local time"""
+    date = datetime.fromtimestamp(timestamp)
+    return date.year * 12 + date.month - 1
+
+
+def parse_blame(output):
+    """Count lines per (author, month) in git blame --porcelain output"""
+    authors = {}
+    times = {}
+    counts = {}
+    sha = None
+    # Only "\n" separates records; content may hold other line breaks
+    for line in output.split("\n"):
+        if line.startswith("\t"):
+            key = (authors.get(sha, ""), month_index(times.get(sha, 0)))
+            counts[key] = counts.get(key, 0) + 1
+        elif line.startswith("author "):
+            authors[sha] = line[7:]
+        elif line.startswith("author-time "):
+            times[sha] = int(line[12:])
+        else:
+            word = line.split(" ", 1)[0]
+            if COMMIT_SHA.fullmatch(word):
+                sha = word
+    return counts
+
+
+def _like_prefix(prefix):
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}/%"
+
+
+class BlameCache:
+    """Per-file blame results for one repository, keyed by blob sha"""
+
+    def __init__(self, root, path=None):
+        self.root = str(root)
+        self.path = Path(path) if path else Path(root) / ".extn_aider" / "history" / "blame.db"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+
+    @property
+    def db(self):
+        """Connection for the calling thread"""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(str(self.path), timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _tree(self, prefix=""):
+        """{path: blob} of files at HEAD under prefix"""
+        cmd = ["git", "ls-tree", "-r", "-l", "-z", "HEAD"]
+        if prefix:
+            cmd += ["--", prefix]
+        result = subprocess.run(cmd, cwd=self.root, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"git ls-tree failed: {result.stderr.strip()}")
+
+        tree = {}
+        for record in result.stdout.split("\0"):
+            if not record:
+                continue
+            # "<mode> blob <sha> <size>\t<path>"
+            info, path = record.split("\t", 1)
+            _, kind, blob, size = info.split()
+            if kind == "blob" and size.isdigit() and int(size) <= MAX_BLAME_BYTES:
+                tree[path] = blob
+        return tree
+
+    def _blame(self, path):
+        result = subprocess.run(
+            ["git", "blame", "--porcelain", "HEAD", "--", path],
+            cwd=self.root, capture_output=True
+        )
+        if result.returncode != 0:
+            return {}
+        # Decoded by hand: text mode would turn a lone "\r" into a line break
+        return parse_blame(result.stdout.decode("utf-8", errors="replace"))
+
+    def refresh(self, prefix="", workers=BLAME_WORKERS):
+        """Re-blame files under prefix whose blob changed; returns how many
+
+        Blames run outside the write lock, so refreshes of different
+        files from several threads proceed in parallel.
+        """
+        tree = self._tree(prefix)
+        db = self.db
+        if prefix:
+            cached = dict(db.execute(
+                "SELECT path, blob FROM files WHERE path = ? OR path LIKE ? ESCAPE '\\'",
+                (prefix, _like_prefix(prefix)),
+            ))
+        else:
+            cached = dict(db.execute("SELECT path, blob FROM files"))
+
+        stale = [path for path, blob in tree.items() if cached.get(path) != blob]
+        removed = [path for path in cached if path not in tree]
+        results = []
+        if stale:
+            with ThreadPoolExecutor(max_workers=min(workers, len(stale))) as executor:
+                results = list(zip(stale, executor.map(self._blame, stale)))
+
+        with self._write_lock:
+            for path in removed:
+                db.execute("DELETE FROM files WHERE path = ?", (path,))
+                db.execute("DELETE FROM ownership WHERE path = ?", (path,))
+            for path, counts in results:
+                db.execute("DELETE FROM ownership WHERE path = ?", (path,))
+                db.executemany(
+                    "INSERT INTO ownership (path, author, month, lines) VALUES (?, ?, ?, ?)",
+                    [(path, author, month, lines) for (author, month), lines in counts.items()],
+                )
+                db.execute(
+                    "INSERT OR REPLACE INTO files (path, blob) VALUES (?, ?)",
+                    (path, tree[path]),
+                )
+            db.commit()
+        return len(stale)
+
+    def ownership(self, prefix=""):
+        """Surviving lines per author under prefix (a file or directory)
+
+        Returns (author, lines, ages) tuples, most lines first, where ages
+        counts the lines in each AGE_BUCKETS bucket.
+        """
+        now = month_index(datetime.now().timestamp())
+        query = "SELECT author, month, SUM(lines) FROM ownership"
+        params = []
+        if prefix:
+            query += " WHERE path = ? OR path LIKE ? ESCAPE '\\'"
+            params += [prefix, _like_prefix(prefix)]
+        query += " GROUP BY author, month"
+
+        totals = {}
+        for author, month, lines in self.db.execute(query, params):
+            ages = totals.setdefault(author, [0] * len(AGE_BUCKETS))
+            age = now - month
+            for i, (limit, _) in enumerate(AGE_BUCKETS):
+                if limit is None or age < limit:
+                    ages[i] += lines
+                    break
+
+        rows = [(author, sum(ages), ages) for author, ages in totals.items()]
+        return sorted(rows, key=lambda row: (-row[1], row[0]))
+
+    def file_ownership(self, path):
+        """{author: surviving lines} for one file"""
+        return {author: lines for author, lines, _ in self.ownership(path)}
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_blame_cache(root):
+    """Return the shared BlameCache for a repository root"""
+    root = str(Path(root).resolve())
+    with _caches_lock:
+        cache = _caches.get(root)
+        if cache is None:
+            cache = _caches[root] = BlameCache(root)
+    return cache
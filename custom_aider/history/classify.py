@@ -0,0 +1,26 @@
+"""Commit message classification shared by the history commands"""
+
+FEATURE = "feature"
+BUGFIX = "bugfix"
+TEST = "test"
+REFACTOR = "refactor"
+OTHER = "other"
+
+CATEGORIES = (FEATURE, BUGFIX, TEST, REFACTOR, OTHER)
+
+# Checked in order; the first category with a matching keyword wins
+KEYWORDS = (
+    (FEATURE, ("feat", "add", "new")),
+    (BUGFIX, ("fix", "bug", "issue")),
+    (TEST, ("test",)),
+    (REFACTOR, ("refactor", "clean")),
+)
+
+
+def classify_message(message):
+    """Category of a commit from keywords in its message"""
+    message = message.lower()
+    for category, keywords in KEYWORDS:
+        if any(keyword in message for keyword in keywords):
+            return category
+    return OTHER
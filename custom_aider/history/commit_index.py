@@ -0,0 +1,600 @@
+"""Persistent, incrementally updated index of a repository's commits
+
+Stores every commit's author, date, message and changed files with line
+stats in SQLite under ``<repo>/.extn_aider/history/commits.db``. update()
+only reads commits between the last indexed HEAD and the current one
+(falling back to a full rebuild after history rewrites), so repeated
+history queries cost a few SQL lookups instead of a walk over the log.
+
+A sparse co-change matrix is maintained alongside: for every pair of
+files changed in the same commit, ``cochange`` holds how many commits
+touched both, stored in both directions so the files most often changed
+with a path are one index range scan away. Commit messages are indexed
+with FTS5 (when SQLite has it) for fast reference lookups.
+
+For Python files, each commit's changed blobs are parsed and diffed at
+the symbol level, recording which functions and classes it added,
+modified or removed and their line ranges, so a symbol's history is an
+indexed lookup rather than a ``git log -L`` run.
+"""
+
+import re
+import sqlite3
+import threading
+import subprocess
+from pathlib import Path
+
+from .gitlog import iter_log
+from .classify import BUGFIX, classify_message
+from .symbols import UNPARSABLE, BlobReader, diff_symbols
+
+INDEX_VERSION = "7"
+
+# Commits are written in batches of this size during the initial build
+BATCH_SIZE = 2000
+
+# Commits touching more files than this (mass renames, reformatting,
+# vendored drops) say little about coupling and would add n^2 pairs
+MAX_COCHANGE_FILES = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS authors (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    UNIQUE (name, email)
+);
+CREATE TABLE IF NOT EXISTS paths (id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS commits (
+    id INTEGER PRIMARY KEY,
+    sha TEXT NOT NULL UNIQUE,
+    timestamp INTEGER NOT NULL,
+    author_id INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    category TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS changes (
+    commit_id INTEGER NOT NULL,
+    path_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    old_path_id INTEGER,
+    added INTEGER NOT NULL,
+    deleted INTEGER NOT NULL,
+    PRIMARY KEY (commit_id, path_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS cochange (
+    path_id INTEGER NOT NULL,
+    other_id INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (path_id, other_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS symbols (
+    id INTEGER PRIMARY KEY,
+    path_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    short_name TEXT NOT NULL COLLATE NOCASE,
+    kind TEXT NOT NULL,
+    UNIQUE (path_id, name)
+);
+CREATE TABLE IF NOT EXISTS symbol_changes (
+    symbol_id INTEGER NOT NULL,
+    commit_id INTEGER NOT NULL,
+    change TEXT NOT NULL,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL,
+    PRIMARY KEY (symbol_id, commit_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS symbols_by_name ON symbols (short_name);
+CREATE INDEX IF NOT EXISTS changes_by_path ON changes (path_id, commit_id);
+CREATE INDEX IF NOT EXISTS cochange_top ON cochange (path_id, count DESC);
+CREATE INDEX IF NOT EXISTS commits_by_time ON commits (timestamp);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS messages
+USING fts5(message, content='commits', content_rowid='id')
+"""
+
+_WORDS = re.compile(r"\w+")
+
+# First line of a commit message, computed in SQL so full messages are not loaded
+SUMMARY = "substr(c.message, 1, instr(c.message || char(10), char(10)) - 1)"
+
+# Ranking orders for hotspots()
+HOTSPOT_ORDERS = {
+    "commits": "commits DESC",
+    "churn": "SUM(ch.added) + SUM(ch.deleted) DESC",
+    "authors": "authors DESC",
+    "fixes": "fixes DESC",
+}
+
+
+def _like_escape(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def dir_prefix(path, depth):
+    """The first depth directories of path, or '.' for top-level files"""
+    return "/".join(path.split("/")[:-1][:depth]) or "."
+
+
+def index_path(root):
+    return Path(root) / ".extn_aider" / "history" / "commits.db"
+
+
+class CommitIndex:
+    """SQLite-backed commit index for one repository"""
+
+    def __init__(self, root, path=None):
+        self.root = str(root)
+        self.path = Path(path) if path else index_path(root)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._author_ids = {}
+        self._path_ids = {}
+        self._symbol_ids = {}
+        self._blobs = None
+
+        db = self.db
+        db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        if self.get_meta("version") not in (None, INDEX_VERSION):
+            # Older layout; rebuild from scratch
+            db.close()
+            self._local.db = None
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{self.path}{suffix}").unlink(missing_ok=True)
+            db = self.db
+        db.executescript(SCHEMA)
+        try:
+            db.execute(FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5; message searches scan instead
+            self.has_fts = False
+        self.set_meta("version", INDEX_VERSION)
+        db.commit()
+
+    @property
+    def db(self):
+        """Connection for the calling thread"""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(str(self.path), timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.create_function("dir_prefix", 2, dir_prefix, deterministic=True)
+            self._local.db = db
+        return db
+
+    def get_meta(self, key):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _clear(self):
+        if self.has_fts:
+            self.db.execute("INSERT INTO messages (messages) VALUES ('delete-all')")
+        for table in ("symbol_changes", "symbols", "cochange", "changes", "commits",
+                      "paths", "authors"):
+            self.db.execute(f"DELETE FROM {table}")
+        self.db.execute("DELETE FROM meta WHERE key != 'version'")
+        self._author_ids.clear()
+        self._path_ids.clear()
+        self._symbol_ids.clear()
+
+    def _git(self, *args):
+        return subprocess.run(
+            ["git", *args], cwd=self.root, capture_output=True, text=True
+        )
+
+    def _head(self):
+        result = self._git("rev-parse", "HEAD")
+        return result.stdout.strip() if result.returncode == 0 else None
+
+    def _author_id(self, name, email):
+        key = (name, email)
+        author_id = self._author_ids.get(key)
+        if author_id is None:
+            self.db.execute(
+                "INSERT OR IGNORE INTO authors (name, email) VALUES (?, ?)", key
+            )
+            author_id = self.db.execute(
+                "SELECT id FROM authors WHERE name = ? AND email = ?", key
+            ).fetchone()[0]
+            self._author_ids[key] = author_id
+        return author_id
+
+    def path_id(self, path, create=True):
+        path_id = self._path_ids.get(path)
+        if path_id is None:
+            if create:
+                self.db.execute("INSERT OR IGNORE INTO paths (path) VALUES (?)", (path,))
+            row = self.db.execute("SELECT id FROM paths WHERE path = ?", (path,)).fetchone()
+            if row is None:
+                return None
+            path_id = self._path_ids[path] = row[0]
+        return path_id
+
+    def _insert(self, entry):
+        """Insert one LogEntry, returning its commit id"""
+        cursor = self.db.execute(
+            "INSERT OR IGNORE INTO commits (sha, timestamp, author_id, message, category) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (entry.sha, entry.timestamp, self._author_id(entry.author, entry.email),
+             entry.message, classify_message(entry.message)),
+        )
+        if not cursor.rowcount:
+            return None
+        commit_id = cursor.lastrowid
+        if self.has_fts:
+            self.db.execute(
+                "INSERT INTO messages (rowid, message) VALUES (?, ?)",
+                (commit_id, entry.message),
+            )
+        self.db.executemany(
+            "INSERT OR REPLACE INTO changes "
+            "(commit_id, path_id, status, old_path_id, added, deleted) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (commit_id, self.path_id(change.path), change.status,
+                 self.path_id(change.old_path) if change.old_path else None,
+                 change.added, change.deleted)
+                for change in entry.files
+            ],
+        )
+        return commit_id
+
+    def on_commit(self, commit_id, entry):
+        """Update derived indexes for a newly indexed commit"""
+        self._add_cochanges(entry)
+        self._add_symbol_changes(commit_id, entry)
+
+    def _add_cochanges(self, entry):
+        path_ids = sorted({self.path_id(change.path) for change in entry.files})
+        if len(path_ids) < 2 or len(path_ids) > MAX_COCHANGE_FILES:
+            return
+        pairs = [(a, b) for a in path_ids for b in path_ids if a != b]
+        self.db.executemany(
+            "INSERT INTO cochange (path_id, other_id, count) VALUES (?, ?, 1) "
+            "ON CONFLICT (path_id, other_id) DO UPDATE SET count = count + 1",
+            pairs,
+        )
+
+    def _symbol_id(self, path_id, name, kind):
+        key = (path_id, name)
+        symbol_id = self._symbol_ids.get(key)
+        if symbol_id is None:
+            self.db.execute(
+                "INSERT OR IGNORE INTO symbols (path_id, name, short_name, kind) "
+                "VALUES (?, ?, ?, ?)",
+                (path_id, name, name.rsplit(".", 1)[-1], kind),
+            )
+            symbol_id = self.db.execute(
+                "SELECT id FROM symbols WHERE path_id = ? AND name = ?", key
+            ).fetchone()[0]
+            self._symbol_ids[key] = symbol_id
+        return symbol_id
+
+    def _add_symbol_changes(self, commit_id, entry):
+        rows = []
+        for change in entry.files:
+            if not change.path.endswith(".py"):
+                continue
+            if self._blobs is None:
+                self._blobs = BlobReader(self.root)
+            old = self._blobs.symbols(change.old_blob)
+            new = self._blobs.symbols(change.new_blob)
+            if old is UNPARSABLE and new is UNPARSABLE:
+                continue
+            if old is UNPARSABLE or new is UNPARSABLE:
+                # Diffing would report every symbol removed (or added) when
+                # a file is only broken for a commit or two; the known side
+                # is still recorded so its symbols are indexed
+                known = new if old is UNPARSABLE else old
+                changes = [(name, "modified", symbol) for name, symbol in (known or {}).items()]
+            else:
+                changes = diff_symbols(old, new)
+            path_id = self.path_id(change.path)
+            for name, kind, symbol in changes:
+                rows.append((self._symbol_id(path_id, name, symbol.kind), commit_id, kind,
+                             symbol.start_line, symbol.end_line))
+        if rows:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO symbol_changes "
+                "(symbol_id, commit_id, change, start_line, end_line) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def update(self):
+        """Index commits added since the last update; returns how many"""
+        with self._write_lock:
+            head = self._head()
+            if head is None:
+                return 0
+
+            last = self.get_meta("head")
+            if last == head:
+                return 0
+
+            revision = head
+            if last:
+                if self._git("merge-base", "--is-ancestor", last, head).returncode == 0:
+                    revision = f"{last}..{head}"
+                else:
+                    # History was rewritten; start over
+                    self._clear()
+
+            count = 0
+            db = self.db
+            try:
+                for entry in iter_log(self.root, revision=revision):
+                    commit_id = self._insert(entry)
+                    if commit_id is None:
+                        continue
+                    self.on_commit(commit_id, entry)
+                    count += 1
+                    if count % BATCH_SIZE == 0:
+                        db.commit()
+            finally:
+                if self._blobs is not None:
+                    self._blobs.close()
+                    self._blobs = None
+
+            self.set_meta("head", head)
+            db.commit()
+            return count
+
+    def file_history(self, path, since=None, until=None, limit=None):
+        """Commits touching path, newest first
+
+        Returns rows of (sha, timestamp, author, summary, category, status,
+        added, deleted). since/until are unix timestamps.
+        """
+        path_id = self.path_id(path, create=False)
+        if path_id is None:
+            return []
+
+        query = (
+            f"SELECT c.sha, c.timestamp, a.name, {SUMMARY}, c.category, "
+            "ch.status, ch.added, ch.deleted "
+            "FROM changes ch JOIN commits c ON c.id = ch.commit_id "
+            "JOIN authors a ON a.id = c.author_id "
+            "WHERE ch.path_id = ?"
+        )
+        params = [path_id]
+        if since is not None:
+            query += " AND c.timestamp >= ?"
+            params.append(int(since))
+        if until is not None:
+            query += " AND c.timestamp <= ?"
+            params.append(int(until))
+        query += " ORDER BY c.timestamp DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        return self.db.execute(query, params).fetchall()
+
+    def change_count(self, path, since=None, until=None):
+        """Number of indexed commits that touched path, optionally
+        within a time window"""
+        path_id = self.path_id(path, create=False)
+        if path_id is None:
+            return 0
+        query = (
+            "SELECT COUNT(*) FROM changes ch JOIN commits c ON c.id = ch.commit_id "
+            "WHERE ch.path_id = ?"
+        )
+        params = [path_id]
+        if since is not None:
+            query += " AND c.timestamp >= ?"
+            params.append(int(since))
+        if until is not None:
+            query += " AND c.timestamp <= ?"
+            params.append(int(until))
+        return self.db.execute(query, params).fetchone()[0]
+
+    def top_cochanges(self, path, limit=10):
+        """Files most often changed together with path, from the matrix
+
+        Returns (other_path, count) pairs, highest count first, all of
+        them when limit is None. Commits touching more than
+        MAX_COCHANGE_FILES files are not counted.
+        """
+        path_id = self.path_id(path, create=False)
+        if path_id is None:
+            return []
+        return self.db.execute(
+            "SELECT p.path, m.count FROM cochange m JOIN paths p ON p.id = m.other_id "
+            "WHERE m.path_id = ? ORDER BY m.count DESC, p.path LIMIT ?",
+            (path_id, -1 if limit is None else int(limit)),
+        ).fetchall()
+
+    def cochange_counts(self, path, since=None, until=None):
+        """How often each other file changed in the same commit as path
+
+        Unlike top_cochanges this joins the raw changes, so it can be
+        limited to a time window. Commits touching more than
+        MAX_COCHANGE_FILES files are skipped, as in the matrix.
+        """
+        path_id = self.path_id(path, create=False)
+        if path_id is None:
+            return {}
+
+        query = (
+            "SELECT p.path, COUNT(*) FROM changes mine "
+            "JOIN commits c ON c.id = mine.commit_id "
+            "JOIN changes other ON other.commit_id = mine.commit_id "
+            "JOIN paths p ON p.id = other.path_id "
+            "WHERE mine.path_id = ? AND other.path_id != ? "
+            "AND (SELECT COUNT(*) FROM changes n WHERE n.commit_id = mine.commit_id) <= ?"
+        )
+        params = [path_id, path_id, MAX_COCHANGE_FILES]
+        if since is not None:
+            query += " AND c.timestamp >= ?"
+            params.append(int(since))
+        if until is not None:
+            query += " AND c.timestamp <= ?"
+            params.append(int(until))
+        query += " GROUP BY other.path_id"
+        return dict(self.db.execute(query, params).fetchall())
+
+    def hotspots(self, since=None, until=None, prefix=None, depth=None, order="commits"):
+        """Churn per file, or per directory when depth is given
+
+        Yields dicts with path, commits, added, deleted, authors and fixes
+        (bug fix commits), ranked by order: commits, churn, authors or
+        fixes. Rows are produced lazily, so callers can stop early.
+        """
+        target = "dir_prefix(p.path, ?)" if depth else "p.path"
+        query = (
+            f"SELECT {target} AS target, COUNT(DISTINCT c.id) AS commits, "
+            "SUM(ch.added) AS added, SUM(ch.deleted) AS deleted, "
+            "COUNT(DISTINCT c.author_id) AS authors, "
+            "COUNT(DISTINCT CASE WHEN c.category = ? THEN c.id END) AS fixes "
+            "FROM changes ch JOIN commits c ON c.id = ch.commit_id "
+            "JOIN paths p ON p.id = ch.path_id WHERE 1 = 1"
+        )
+        params = [depth] if depth else []
+        params.append(BUGFIX)
+        if since is not None:
+            query += " AND c.timestamp >= ?"
+            params.append(int(since))
+        if until is not None:
+            query += " AND c.timestamp <= ?"
+            params.append(int(until))
+        if prefix:
+            query += " AND p.path LIKE ? ESCAPE '\\'"
+            params.append(f"{_like_escape(prefix)}%")
+        query += f" GROUP BY target ORDER BY {HOTSPOT_ORDERS[order]}, target"
+
+        for path, commits, added, deleted, authors, fixes in self.db.execute(query, params):
+            yield {
+                "path": path,
+                "commits": commits,
+                "added": added,
+                "deleted": deleted,
+                "authors": authors,
+                "fixes": fixes,
+            }
+
+    def find_symbols(self, target):
+        """Symbols matching a dotted target, as (path, name, kind) rows
+
+        The target is matched case-insensitively against the tail of the
+        file's module path joined with the qualified name, so ``init``,
+        ``Database.init`` and ``database.Database.init`` all find
+        ``Database.init`` in ``app/database.py``.
+        """
+        parts = [part.lower() for part in target.split(".") if part]
+        if not parts:
+            return []
+        rows = self.db.execute(
+            "SELECT p.path, s.name, s.kind FROM symbols s JOIN paths p ON p.id = s.path_id "
+            "WHERE s.short_name = ? ORDER BY p.path, s.name",
+            (parts[-1],),
+        ).fetchall()
+
+        matches = []
+        for path, name, kind in rows:
+            module = path[:-3].split("/")
+            if module[-1] == "__init__":
+                module.pop()
+            full = [part.lower() for part in module + name.split(".")]
+            if full[-len(parts):] == parts:
+                matches.append((path, name, kind))
+        return matches
+
+    def symbol_history(self, path, name, since=None, until=None, limit=None):
+        """Changes to one symbol, newest first
+
+        Returns rows of (sha, timestamp, author, summary, category, change,
+        start_line, end_line).
+        """
+        path_id = self.path_id(path, create=False)
+        if path_id is None:
+            return []
+        query = (
+            f"SELECT c.sha, c.timestamp, a.name, {SUMMARY}, c.category, "
+            "sc.change, sc.start_line, sc.end_line "
+            "FROM symbols s JOIN symbol_changes sc ON sc.symbol_id = s.id "
+            "JOIN commits c ON c.id = sc.commit_id JOIN authors a ON a.id = c.author_id "
+            "WHERE s.path_id = ? AND s.name = ?"
+        )
+        params = [path_id, name]
+        if since is not None:
+            query += " AND c.timestamp >= ?"
+            params.append(int(since))
+        if until is not None:
+            query += " AND c.timestamp <= ?"
+            params.append(int(until))
+        query += " ORDER BY c.timestamp DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        return self.db.execute(query, params).fetchall()
+
+    def find_message(self, text, pattern=None):
+        """Newest commit whose message contains text, as (sha, timestamp)
+
+        Matching is case-insensitive. If pattern (a compiled regex) is
+        given, it must also match the message. Candidates come from the
+        full-text index by word prefix; if none of those match, messages
+        are scanned so text inside a word is still found.
+        """
+        needle = text.lower()
+
+        def matches(message):
+            return needle in message.lower() and (pattern is None or pattern.search(message))
+
+        words = _WORDS.findall(text)
+        if self.has_fts and words:
+            query = " AND ".join(f'"{word}"*' for word in words)
+            rows = self.db.execute(
+                "SELECT c.sha, c.timestamp, c.message FROM messages "
+                "JOIN commits c ON c.id = messages.rowid "
+                "WHERE messages MATCH ? ORDER BY c.timestamp DESC",
+                (query,),
+            )
+            for sha, timestamp, message in rows:
+                if matches(message):
+                    return sha, timestamp
+
+        rows = self.db.execute(
+            "SELECT sha, timestamp, message FROM commits "
+            "WHERE message LIKE ? ESCAPE '\\' ORDER BY timestamp DESC",
+            (f"%{_like_escape(needle)}%",),
+        )
+        for sha, timestamp, message in rows:
+            if matches(message):
+                return sha, timestamp
+        return None
+
+    def commit_time(self, sha):
+        """Author timestamp of an indexed commit, or None"""
+        row = self.db.execute("SELECT timestamp FROM commits WHERE sha = ?", (sha,)).fetchone()
+        return row[0] if row else None
+
+    def commit_files(self, sha):
+        """Paths changed by a commit"""
+        return [row[0] for row in self.db.execute(
+            "SELECT p.path FROM commits c JOIN changes ch ON ch.commit_id = c.id "
+            "JOIN paths p ON p.id = ch.path_id WHERE c.sha = ?", (sha,)
+        )]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_commit_index(root):
+    """Return the shared, up to date CommitIndex for a repository root"""
+    root = str(Path(root).resolve())
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = _indexes[root] = CommitIndex(root)
+    index.update()
+    return index
@@ -0,0 +1,100 @@
+"""Prefix index over repository paths for fast command completion
+
+The index is a sorted array of (lowercased key, value) pairs holding
+every tracked path and file stem. A lookup bisects to the first key with
+the typed prefix and walks forward only while keys still match, so each
+keystroke costs O(log n + matches) instead of rebuilding and sorting
+every candidate. The array is rebuilt only when the repository changes,
+detected from the mtimes of git's HEAD, current ref and index files.
+"""
+
+import os
+import threading
+import subprocess
+from bisect import bisect_left
+from pathlib import Path
+
+# Upper bound on completions returned for one prefix
+MAX_MATCHES = 200
+
+
+class PathPrefixIndex:
+    """Sorted prefix index over the tracked files of one repository"""
+
+    def __init__(self, root):
+        self.root = str(root)
+        self._git_dir = self._find_git_dir()
+        self._state = None
+        # (sorted lowercase keys, matching values), replaced as one tuple
+        # so readers never pair keys and values of different builds
+        self._entries = ([], [])
+        self._lock = threading.Lock()
+
+    def _find_git_dir(self):
+        result = subprocess.run(
+            ["git", "rev-parse", "--absolute-git-dir"],
+            cwd=self.root, capture_output=True, text=True
+        )
+        return Path(result.stdout.strip()) if result.returncode == 0 else None
+
+    def _repo_state(self):
+        """Cheap fingerprint that changes when HEAD or the index changes"""
+        if self._git_dir is None:
+            return None
+        files = [self._git_dir / "HEAD", self._git_dir / "index"]
+        try:
+            head = files[0].read_text().strip()
+        except OSError:
+            head = ""
+        if head.startswith("ref: "):
+            files.append(self._git_dir / head[5:])
+            files.append(self._git_dir / "packed-refs")
+
+        state = [head]
+        for path in files:
+            try:
+                stat = path.stat()
+                state.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                state.append(None)
+        return tuple(state)
+
+    def refresh(self, list_files):
+        """Rebuild from list_files() if the repository changed"""
+        state = self._repo_state()
+        with self._lock:
+            if self._entries[0] and state is not None and state == self._state:
+                return
+            entries = set()
+            for path in list_files():
+                entries.add((path.lower(), path))
+                stem = Path(path).stem
+                entries.add((stem.lower(), stem))
+            entries = sorted(entries)
+            self._entries = ([key for key, _ in entries], [value for _, value in entries])
+            self._state = state
+
+    def complete(self, prefix, limit=MAX_MATCHES):
+        """Yield paths and stems starting with prefix (case-insensitive)"""
+        prefix = prefix.lower()
+        keys, values = self._entries
+        i = bisect_left(keys, prefix)
+        seen = 0
+        while i < len(keys) and keys[i].startswith(prefix) and seen < limit:
+            yield values[i]
+            i += 1
+            seen += 1
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_path_index(root, list_files):
+    """Shared, up to date PathPrefixIndex for a repository root"""
+    root = os.path.realpath(root)
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = _indexes[root] = PathPrefixIndex(root)
+    index.refresh(list_files)
+    return index
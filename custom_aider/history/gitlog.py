@@ -0,0 +1,183 @@
+"""Single-pass streaming reader for git history
+
+Runs one ``git log --raw --numstat -z`` process and parses its output
+while it streams, yielding one LogEntry per commit with the files it
+changed and their line stats. No GitPython Commit or Diff objects are
+created, and nothing is buffered beyond the commit being parsed.
+"""
+
+import codecs
+import subprocess
+from datetime import datetime
+
+RECORD_SEP = "\x1e"
+FIELD_SEP = "\x1f"
+
+# sha, parents, author time, author name, author email, message
+LOG_FORMAT = "%x1e%H%x1f%P%x1f%at%x1f%an%x1f%ae%x1f%B%x1f"
+
+READ_SIZE = 1 << 16
+
+
+class FileChange:
+    """One file touched by a commit"""
+
+    __slots__ = ("status", "path", "old_path", "added", "deleted", "old_blob", "new_blob")
+
+    def __init__(self, status, path, old_path=None, added=0, deleted=0,
+                 old_blob=None, new_blob=None):
+        self.status = status
+        self.path = path
+        self.old_path = old_path
+        self.added = added
+        self.deleted = deleted
+        # Blob shas before and after; all zeros for added or deleted files
+        self.old_blob = old_blob
+        self.new_blob = new_blob
+
+    def __repr__(self):
+        return f"FileChange({self.status} {self.path} +{self.added} -{self.deleted})"
+
+
+class LogEntry:
+    """A commit as reported by git log"""
+
+    __slots__ = ("sha", "parents", "timestamp", "author", "email", "message", "files")
+
+    def __init__(self, sha, parents, timestamp, author, email, message, files):
+        self.sha = sha
+        self.parents = parents
+        self.timestamp = timestamp
+        self.author = author
+        self.email = email
+        self.message = message
+        self.files = files
+
+    @property
+    def date(self):
+        """Author date as a naive local datetime"""
+        return datetime.fromtimestamp(self.timestamp)
+
+    @property
+    def summary(self):
+        return self.message.split("\n", 1)[0]
+
+    def change_for(self, path):
+        """The FileChange for path in this commit, if any"""
+        for change in self.files:
+            if change.path == path or change.old_path == path:
+                return change
+        return None
+
+
+def _stat(value):
+    # Binary files report "-" for both counts
+    return int(value) if value.isdigit() else 0
+
+
+def _parse_changes(tokens):
+    """Parse the NUL separated --raw and --numstat sections of one commit"""
+    changes = {}
+    order = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i].lstrip("\n")
+        i += 1
+        if not token:
+            continue
+
+        if token.startswith(":"):
+            # ":<old mode> <new mode> <old blob> <new blob> <status>"
+            _, _, old_blob, new_blob, status = token.split(" ", 4)
+            if status[0] in "RC":
+                old_path, path = tokens[i], tokens[i + 1]
+                i += 2
+            else:
+                old_path, path = None, tokens[i]
+                i += 1
+            changes[path] = FileChange(status[0], path, old_path,
+                                       old_blob=old_blob, new_blob=new_blob)
+            order.append(path)
+            continue
+
+        added, deleted, path = token.split("\t", 2)
+        if not path:
+            # Renames and copies list the old and new path as separate tokens
+            path = tokens[i + 1]
+            i += 2
+        change = changes.get(path)
+        if change is None:
+            change = changes[path] = FileChange("M", path)
+            order.append(path)
+        change.added = _stat(added)
+        change.deleted = _stat(deleted)
+
+    return [changes[path] for path in order]
+
+
+def _parse_record(record):
+    sha, parents, timestamp, author, email, message, rest = record.split(FIELD_SEP, 6)
+    return LogEntry(
+        sha=sha,
+        parents=parents.split(),
+        timestamp=int(timestamp),
+        author=author,
+        email=email,
+        message=message.strip(),
+        files=_parse_changes(rest.split("\0")),
+    )
+
+
+def iter_log(repo_root, revision=None, paths=None, since=None, full_diff=True,
+             extra_args=None):
+    """Stream commits from git log, newest first
+
+    revision is a revision or range (default HEAD). When paths are given,
+    only commits touching them are returned; with full_diff those commits
+    still list every file they changed, which is what co-change analysis
+    needs. since is a datetime passed to git as --since to stop early.
+    """
+    cmd = [
+        "git", "log", "--raw", "--numstat", "-z", "-M", "--no-abbrev",
+        "--no-color", "--no-ext-diff", f"--format={LOG_FORMAT}",
+    ]
+    if full_diff and paths:
+        cmd.append("--full-diff")
+    if since is not None:
+        cmd.append(f"--since={since.isoformat()}")
+    if extra_args:
+        cmd.extend(extra_args)
+    cmd.append(revision or "HEAD")
+    cmd.append("--")
+    if paths:
+        cmd.extend(paths)
+
+    process = subprocess.Popen(
+        cmd, cwd=repo_root, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    try:
+        while True:
+            data = process.stdout.read(READ_SIZE)
+            if not data:
+                break
+            buffer += decoder.decode(data)
+            records = buffer.split(RECORD_SEP)
+            # The last record may still be incomplete
+            buffer = records.pop()
+            for record in records:
+                if record:
+                    yield _parse_record(record)
+        if buffer:
+            yield _parse_record(buffer)
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        stderr = process.stderr.read().decode("utf-8", errors="replace")
+        process.stderr.close()
+        returncode = process.wait()
+
+    if returncode not in (0, -9) and stderr.strip():
+        raise RuntimeError(f"git log failed: {stderr.strip()}")
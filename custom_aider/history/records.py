@@ -0,0 +1,43 @@
+"""Compact per-commit records for history reports"""
+
+import sys
+from datetime import datetime
+
+from .classify import classify_message
+
+
+class HistoryRecord:
+    """One commit in the history of a file or symbol
+
+    Keeps only what reports need: the first line of the message, the
+    category it was classified as, an interned author name and line
+    stats. Diffs are never held; they are loaded on demand with
+    CodeHistorian.get_diff.
+
+    change is the file status letter (A, M, D, R...) for file history, or
+    added/modified/removed for symbol history, where lines holds the
+    symbol's (start, end) line range.
+    """
+
+    __slots__ = ("sha", "timestamp", "author", "category", "summary", "change",
+                 "added", "deleted", "lines")
+
+    def __init__(self, sha, timestamp, author, summary, category=None, change=None,
+                 added=0, deleted=0, lines=None):
+        self.sha = sha
+        self.timestamp = timestamp
+        self.author = sys.intern(author)
+        self.summary = summary
+        self.category = category or classify_message(summary)
+        self.change = change
+        self.added = added
+        self.deleted = deleted
+        self.lines = lines
+
+    @property
+    def date(self):
+        """Author date as a naive local datetime"""
+        return datetime.fromtimestamp(self.timestamp)
+
+    def __repr__(self):
+        return f"HistoryRecord({self.sha[:8]} {self.category} {self.summary!r})"
@@ -0,0 +1,142 @@
+"""Python symbol tables and symbol-level diffs for history indexing
+
+extract_symbols() parses a Python source into its functions and classes
+keyed by qualified name (``Class.method``, ``outer.inner``) with their
+line ranges and a digest of their source lines. diff_symbols() compares
+two such tables to tell which symbols a change added, modified or
+removed. BlobReader fetches file contents from git's object store
+through one long-lived ``git cat-file --batch`` process.
+"""
+
+import ast
+import hashlib
+import subprocess
+from collections import OrderedDict
+
+NULL_SHA = "0" * 40
+
+# Symbol table of a blob that exists but could not be read or parsed
+# (syntax error, too large); its symbols are unknown, not absent
+UNPARSABLE = object()
+
+# Symbol tables of recently read blobs; a commit's old blob is usually
+# the new blob of the commit indexed right after it
+CACHE_SIZE = 512
+
+# Very large files (generated code, vendored bundles) are not parsed
+MAX_BLOB_BYTES = 1 << 20
+
+
+class Symbol:
+    """A function or class in one version of a file"""
+
+    __slots__ = ("kind", "start_line", "end_line", "digest")
+
+    def __init__(self, kind, start_line, end_line, digest):
+        self.kind = kind
+        self.start_line = start_line
+        self.end_line = end_line
+        self.digest = digest
+
+
+def extract_symbols(source):
+    """Map qualified names to Symbols, or None if source does not parse"""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+
+    lines = source.splitlines()
+    symbols = {}
+
+    def visit(node, prefix):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                kind = "function"
+            elif isinstance(child, ast.ClassDef):
+                kind = "class"
+            else:
+                visit(child, prefix)
+                continue
+
+            name = f"{prefix}{child.name}"
+            start = min([child.lineno] + [d.lineno for d in child.decorator_list])
+            end = child.end_lineno or child.lineno
+            text = "\n".join(lines[start - 1:end])
+            digest = hashlib.blake2b(text.encode("utf-8", "replace"), digest_size=8).hexdigest()
+            # Redefinitions (e.g. under if/else) keep the first one
+            symbols.setdefault(name, Symbol(kind, start, end, digest))
+            visit(child, f"{name}.")
+
+    visit(tree, "")
+    return symbols
+
+
+def diff_symbols(old, new):
+    """Yield (name, change, symbol) for symbols that differ
+
+    change is 'added', 'modified' or 'removed'; symbol is the new
+    version, except for removals.
+    """
+    old = old or {}
+    new = new or {}
+    for name, symbol in new.items():
+        before = old.get(name)
+        if before is None:
+            yield name, "added", symbol
+        elif before.digest != symbol.digest:
+            yield name, "modified", symbol
+    for name, symbol in old.items():
+        if name not in new:
+            yield name, "removed", symbol
+
+
+class BlobReader:
+    """Reads blobs through a persistent git cat-file --batch process
+
+    symbols() returns the parsed symbol table of a blob, cached by sha:
+    None when there is no blob (the file is added or deleted) and
+    UNPARSABLE when its symbols cannot be known.
+    """
+
+    def __init__(self, repo_root):
+        self.process = subprocess.Popen(
+            ["git", "cat-file", "--batch"], cwd=repo_root,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        self._cache = OrderedDict()
+
+    def read(self, sha):
+        """Blob contents as bytes, or None if missing or too large"""
+        if not sha or sha == NULL_SHA:
+            return None
+        self.process.stdin.write(f"{sha}\n".encode())
+        self.process.stdin.flush()
+        header = self.process.stdout.readline().decode().split()
+        if len(header) != 3:
+            # "<sha> missing"
+            return None
+        size = int(header[2])
+        data = self.process.stdout.read(size + 1)[:size]
+        return data if size <= MAX_BLOB_BYTES else None
+
+    def symbols(self, sha):
+        if not sha or sha == NULL_SHA:
+            return None
+        if sha in self._cache:
+            self._cache.move_to_end(sha)
+            return self._cache[sha]
+
+        data = self.read(sha)
+        table = extract_symbols(data.decode("utf-8", "replace")) if data is not None else None
+        if table is None:
+            table = UNPARSABLE
+        self._cache[sha] = table
+        if len(self._cache) > CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return table
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            self.process.wait()
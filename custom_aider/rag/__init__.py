@@ -0,0 +1,3 @@
+"""
+Shared RAG helpers used by the document and aichat RAG commands
+"""
@@ -0,0 +1,259 @@
+"""Pooled HTTP client for the aichat RAG API
+
+One keep-alive session is shared by all commands in a process. Requests
+have connect/read timeouts and are retried with exponential backoff on
+connection errors and 429/5xx responses. Several (rag, query) searches
+can be fanned out concurrently, and results are cached for a short time
+so repeating a query does not hit the server again.
+
+The endpoint defaults to http://localhost:8000 and can be changed with
+EXTN_AIDER_AICHAT_URL.
+"""
+
+import os
+import re
+import json
+import time
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_BASE_URL = os.environ.get("EXTN_AIDER_AICHAT_URL", "http://localhost:8000")
+SEARCH_PATH = "/v1/rags/search"
+LIST_PATH = "/v1/rags"
+
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 60
+RETRIES = 3
+BACKOFF_FACTOR = 0.5
+POOL_SIZE = 8
+
+CACHE_TTL = 300
+CACHE_SIZE = 256
+
+# Discovered RAG names are kept on disk and refreshed in the background
+DISCOVERY_FILE = Path.home() / ".extn_aider" / "aichat_rags.json"
+DISCOVERY_TTL = 600
+
+_CONTEXT_PATTERN = re.compile(r"<context>(.*?)</context>", re.DOTALL)
+
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire after ttl seconds"""
+
+    def __init__(self, ttl=CACHE_TTL, max_entries=CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            stored, value = entry
+            if time.monotonic() - stored > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class AichatClient:
+    """Client for aichat's RAG endpoints backed by a pooled requests Session"""
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+                 retries=RETRIES, backoff_factor=BACKOFF_FACTOR, pool_size=POOL_SIZE,
+                 cache_ttl=CACHE_TTL):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.cache = TTLCache(cache_ttl)
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            # Searches are read-only, so retrying the POST is safe
+            allowed_methods=frozenset(["GET", "POST"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+        })
+
+    def search(self, rag_name, query, use_cache=True):
+        """Search one RAG and return the text inside its <context> tags"""
+        key = (rag_name, query)
+        if use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        response = self.session.post(
+            self.base_url + SEARCH_PATH,
+            json={"name": rag_name, "input": query},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+
+        result = response.json()
+        if "data" not in result:
+            raise ValueError("Unexpected response format - missing 'data' field")
+
+        # The context is wrapped in <context> tags in the response
+        context_match = _CONTEXT_PATTERN.search(result["data"])
+        if not context_match:
+            raise ValueError("No context found in response")
+
+        context = context_match.group(1).strip()
+        self.cache.set(key, context)
+        return context
+
+    def list_rags(self):
+        """Return the names of the RAGs available on the server"""
+        response = self.session.get(self.base_url + LIST_PATH, timeout=self.timeout)
+        response.raise_for_status()
+        result = response.json()
+        if "data" not in result:
+            raise ValueError("Unexpected response format - missing 'data' field")
+        return [rag if isinstance(rag, str) else rag.get("name", "") for rag in result["data"]]
+
+    def search_many(self, requests_):
+        """Run several (rag_name, query) searches concurrently
+
+        Returns (rag_name, query, context, error) tuples in request order;
+        exactly one of context and error is None.
+        """
+        def run(pair):
+            rag_name, query = pair
+            try:
+                return rag_name, query, self.search(rag_name, query), None
+            except Exception as e:
+                return rag_name, query, None, e
+
+        requests_ = list(requests_)
+        if len(requests_) == 1:
+            return [run(requests_[0])]
+
+        workers = min(self.pool_size, len(requests_))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(run, requests_))
+
+    def close(self):
+        self.session.close()
+
+
+class RagDiscovery:
+    """RAG names discovered from the server, cached on disk with a TTL
+
+    names() never touches the network: it returns the cached names and,
+    when they are missing or older than the TTL, starts one background
+    refresh. This keeps tab completion instant.
+    """
+
+    def __init__(self, client, path=DISCOVERY_FILE, ttl=DISCOVERY_TTL):
+        self.client = client
+        self.path = path
+        self.ttl = ttl
+        self._names = None
+        self._fetched = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return
+        # Ignore names cached for a different server
+        if data.get("url") == self.client.base_url:
+            self._names = data.get("names", [])
+            self._fetched = data.get("fetched", 0.0)
+
+    def _save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps({
+                "url": self.client.base_url,
+                "fetched": self._fetched,
+                "names": self._names,
+            }, indent=2))
+        except OSError:
+            pass
+
+    def refresh(self):
+        """Fetch the names from the server now and update the cache"""
+        names = sorted(self.client.list_rags())
+        with self._lock:
+            self._names = names
+            self._fetched = time.time()
+            self._save()
+        return names
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception:
+            # Keep serving the old names; try again after the next TTL check
+            with self._lock:
+                self._fetched = time.time() - self.ttl + 30
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def names(self):
+        """Cached names, scheduling a background refresh when stale"""
+        with self._lock:
+            stale = time.time() - self._fetched > self.ttl
+            if stale and not self._refreshing:
+                self._refreshing = True
+                threading.Thread(target=self._refresh_in_background, daemon=True).start()
+            return list(self._names or [])
+
+
+_client = None
+_discovery = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Return the process-wide client, creating it on first use"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AichatClient()
+        return _client
+
+
+def get_discovery():
+    """Return the process-wide RAG discovery cache"""
+    global _discovery
+    client = get_client()
+    with _client_lock:
+        if _discovery is None:
+            _discovery = RagDiscovery(client)
+        return _discovery
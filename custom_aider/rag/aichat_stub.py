@@ -0,0 +1,141 @@
+"""Minimal stand-in for the aichat server's RAG API
+
+Serves ``POST /v1/rags/search`` (and ``GET /v1/rags``) from in-memory
+documents so the aichat commands and client can be exercised without a
+live aichat. Search returns the paragraphs sharing the most words with
+the query, wrapped in ``<context>`` tags like aichat does.
+
+Run with:
+
+    python -m custom_aider.rag.aichat_stub [--port 8000] [--rag NAME=FILE ...]
+
+or start it in-process with ``start_stub()``.
+"""
+
+import re
+import json
+import argparse
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_RAGS = {
+    "aichat-wiki": (
+        "aichat is an all-in-one LLM CLI tool.\n\n"
+        "Use `aichat --serve` to start the HTTP server.\n\n"
+        "RAGs are built with `.rag <name>` in the REPL."
+    ),
+    "temp": "Temporary RAG used for testing.",
+}
+
+TOP_K = 3
+
+_WORDS = re.compile(r"\w+")
+
+
+def _search(text, query, k=TOP_K):
+    words = set(_WORDS.findall(query.lower()))
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+    ranked = sorted(
+        paragraphs,
+        key=lambda p: len(words & set(_WORDS.findall(p.lower()))),
+        reverse=True,
+    )
+    return ranked[:k]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Request handler implementing the subset of aichat's API we use"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real server
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.request_count += 1
+        if self.path.rstrip("/") == "/v1/rags":
+            self._reply(200, {"data": sorted(self.server.rags)})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        self.server.request_count += 1
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._reply(400, {"error": "invalid json"})
+            return
+
+        if self.path.rstrip("/") != "/v1/rags/search":
+            self._reply(404, {"error": "not found"})
+            return
+
+        name = request.get("name")
+        if name not in self.server.rags:
+            self._reply(400, {"error": f"Unknown rag '{name}'"})
+            return
+
+        passages = _search(self.server.rags[name], request.get("input", ""))
+        context = "\n\n".join(passages)
+        self._reply(200, {"data": f"Answer the query based on the context.\n<context>\n{context}\n</context>"})
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, rags=None, verbose=False):
+        self.rags = dict(rags or DEFAULT_RAGS)
+        self.verbose = verbose
+        self.request_count = 0
+        super().__init__(address, StubHandler)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_stub(rags=None, port=0):
+    """Start a stub server on a background thread and return it
+
+    Use ``server.url`` as the client's base URL and ``server.shutdown()``
+    to stop it. Port 0 picks a free port.
+    """
+    server = StubServer(("127.0.0.1", port), rags)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub aichat RAG server")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--rag", action="append", default=[], metavar="NAME=FILE",
+                        help="Serve FILE as RAG NAME (repeatable)")
+    args = parser.parse_args()
+
+    rags = dict(DEFAULT_RAGS)
+    for spec in args.rag:
+        name, _, path = spec.partition("=")
+        rags[name] = Path(path).read_text(encoding="utf-8")
+
+    server = StubServer(("127.0.0.1", args.port), rags, verbose=True)
+    print(f"Stub aichat server on {server.url} serving: {', '.join(sorted(rags))}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""Benchmark and recall harness for document RAGs
+
+Builds RAGs from a corpus at several sizes with the same code path as
+/createragfromdoc and reports, per size and mode:
+
+- ingest time and throughput (chunks/s and KB/s)
+- on-disk size of the persisted RAG (per storage format)
+- index load time
+- query latency p50/p99
+- recall@k against exact search with the reference model
+
+Ground truth is computed separately from every RAG: the chunks are
+embedded with the reference model (``--embed``) and each query's top-k
+is found by brute-force cosine similarity in float64. Every mode, the
+reference included, is scored by how many of those chunks its retriever
+returns, so the reference row measures what persistence and retrieval
+lose, and each ``--compare`` mode (for example a quantized backend) what
+its embeddings lose on top. Without ``--compare`` only the former is
+measured, which for the reference backend alone is close to 1.0. Modes
+may name a storage format after ``@`` to compare persistence formats
+(``hash@json`` vs ``hash``).
+
+Example:
+
+    python -m custom_aider.rag.benchmark lancedb_lessons_ragsource.md \\
+        --sizes 0.25,0.5,1 --embed onnx --compare onnx-int8 -k 5
+"""
+
+import re
+import json
+import math
+import time
+import random
+import hashlib
+import argparse
+import tempfile
+import contextlib
+from io import StringIO
+from pathlib import Path
+
+import numpy as np
+
+# Importing the commands module registers them, which prints debug lines
+with contextlib.redirect_stdout(StringIO()):
+    from ..commands.docrag_commands import RAGManager
+from .storage import dir_size
+
+DEFAULT_SIZES = (0.25, 0.5, 1.0)
+DEFAULT_QUERIES = 50
+LOAD_REPEATS = 3
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct * len(ordered) / 100) - 1))
+    return ordered[rank]
+
+
+def load_corpus(path):
+    """Read a text file, or concatenate all .md/.txt files in a directory"""
+    path = Path(path)
+    if path.is_dir():
+        files = sorted(p for p in path.rglob("*") if p.suffix in (".md", ".txt"))
+        return "\n\n".join(f.read_text(encoding="utf-8", errors="replace") for f in files)
+    return path.read_text(encoding="utf-8", errors="replace")
+
+
+def sample_queries(text, count=DEFAULT_QUERIES, seed=0):
+    """Use markdown headings (or sentences) of the corpus as queries"""
+    queries = [m.group(1).strip() for m in re.finditer(r"^#+\s+(.+)$", text, re.MULTILINE)]
+    if len(queries) < count:
+        sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if 20 < len(s.strip()) < 200]
+        queries += sentences
+    queries = list(dict.fromkeys(queries))
+    random.Random(seed).shuffle(queries)
+    return queries[:count]
+
+
+def truncate_corpus(text, fraction):
+    """First fraction of the corpus, cut at a line boundary"""
+    if fraction >= 1:
+        return text
+    cut = text.rfind("\n", 0, int(len(text) * fraction))
+    return text[:cut if cut > 0 else int(len(text) * fraction)]
+
+
+def _key(text):
+    return hashlib.sha1(text.strip().encode("utf-8", "replace")).hexdigest()
+
+
+def run_mode(manager, nickname, doc_path, spec, queries, k):
+    """Build, load and query one RAG, returning metrics and per-query results
+
+    A mode is an embedding backend spec, optionally followed by a storage
+    format, e.g. ``onnx-int8`` or ``hash@json``.
+    """
+    embed, _, fmt = spec.partition("@")
+    start = time.perf_counter()
+    result = manager.create_rag(nickname, str(doc_path), embed, fmt or "compact")
+    ingest = time.perf_counter() - start
+    if result.startswith("Error"):
+        raise RuntimeError(result)
+
+    load_times = []
+    for _ in range(LOAD_REPEATS):
+        start = time.perf_counter()
+        index = manager._load_index(nickname)
+        load_times.append(time.perf_counter() - start)
+
+    retriever = index.as_retriever(similarity_top_k=k)
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        nodes = retriever.retrieve(query)
+        latencies.append(time.perf_counter() - start)
+        results.append([_key(node.text) for node in nodes])
+
+    chunks = manager.metadata[nickname]["num_nodes"]
+    size_kb = doc_path.stat().st_size / 1024
+    return {
+        "mode": spec,
+        "chunks": chunks,
+        "ingest_s": ingest,
+        "chunks_per_s": chunks / ingest if ingest else 0.0,
+        "kb_per_s": size_kb / ingest if ingest else 0.0,
+        "disk_kb": dir_size(manager.cache_dir / nickname) / 1024,
+        "load_ms": percentile(load_times, 50) * 1000,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }, results
+
+
+def exact_results(manager, nickname, queries, k):
+    """Top-k chunk keys per query by brute-force cosine similarity
+
+    Chunks of the RAG are embedded again with the model it was built
+    with and compared in float64, independent of the stored vectors and
+    of the vector store's search.
+    """
+    index = manager._load_index(nickname)
+    embed_model = manager.embed_model_for(nickname)
+    texts = [node.text for node in index.docstore.docs.values()]
+    keys = [_key(text) for text in texts]
+
+    chunks = np.array(embed_model.get_text_embedding_batch(texts), dtype=np.float64)
+    chunks /= np.maximum(np.linalg.norm(chunks, axis=1, keepdims=True), 1e-12)
+
+    results = []
+    for query in queries:
+        vector = np.array(embed_model.get_query_embedding(query), dtype=np.float64)
+        scores = chunks @ (vector / max(np.linalg.norm(vector), 1e-12))
+        top = np.argsort(-scores, kind="stable")[:k]
+        results.append([keys[i] for i in top])
+    return results
+
+
+def recall_at_k(truth, found, k):
+    """Mean fraction of the reference top-k that a mode also returned"""
+    scores = []
+    for expected, actual in zip(truth, found):
+        expected = set(expected[:k])
+        if expected:
+            scores.append(len(expected & set(actual[:k])) / len(expected))
+    return sum(scores) / len(scores) if scores else 0.0
+
+
+def run_benchmark(corpus, sizes=DEFAULT_SIZES, embed="hash", compare=(), k=5,
+                  queries=None, work_dir=None):
+    """Run the benchmark and return one row of metrics per (size, mode)"""
+    text = load_corpus(corpus)
+    queries = queries or sample_queries(text)
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        tmp = Path(tmp)
+        manager = RAGManager(cache_dir=tmp / "rags")
+        rows = []
+        for size_index, fraction in enumerate(sizes):
+            doc_path = tmp / f"corpus_{size_index}.md"
+            doc_path.write_text(truncate_corpus(text, fraction), encoding="utf-8")
+
+            truth = None
+            for mode_index, spec in enumerate([embed, *compare]):
+                nickname = f"bench{size_index}m{mode_index}"
+                row, results = run_mode(manager, nickname, doc_path, spec, queries, k)
+                if truth is None:
+                    truth = exact_results(manager, nickname, queries, k)
+                row["size"] = fraction
+                row[f"recall@{k}"] = recall_at_k(truth, results, k)
+                rows.append(row)
+                manager.delete_rag(nickname)
+        return rows
+
+
+def format_rows(rows, k):
+    """Render benchmark rows as a fixed-width table"""
+    columns = [
+        ("size", 5, ".2f"), ("mode", -28, ""), ("chunks", 7, "d"),
+        ("chunks_per_s", 12, ".1f"), ("kb_per_s", 9, ".1f"), ("disk_kb", 9, ".1f"),
+        ("load_ms", 8, ".1f"), ("p50_ms", 8, ".2f"), ("p99_ms", 8, ".2f"),
+        (f"recall@{k}", 9, ".3f"),
+    ]
+
+    def cell(value, width, spec):
+        text = format(value, spec)
+        return text.ljust(-width) if width < 0 else text.rjust(width)
+
+    header = "  ".join(cell(name, width, "") for name, width, _ in columns)
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        lines.append("  ".join(cell(row[name], width, spec) for name, width, spec in columns))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark document RAG ingest and retrieval")
+    parser.add_argument("corpus", help="Text/markdown file or directory of them")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma separated corpus fractions (default: 0.25,0.5,1.0)")
+    parser.add_argument("--embed", default="hash",
+                        help="Reference embedding backend spec, used for the exact "
+                             "search ground truth (default: hash)")
+    parser.add_argument("--compare", action="append", default=[],
+                        help="Backend spec to score against the reference (repeatable); "
+                             "without it recall only covers the reference's own "
+                             "storage and retrieval")
+    parser.add_argument("-k", type=int, default=5, help="Results per query (default: 5)")
+    parser.add_argument("--queries", help="File with one query per line")
+    parser.add_argument("--json", help="Also write the rows to this JSON file")
+    args = parser.parse_args()
+
+    queries = None
+    if args.queries:
+        queries = [q.strip() for q in Path(args.queries).read_text().splitlines() if q.strip()]
+
+    sizes = [float(s) for s in args.sizes.split(",") if s.strip()]
+    rows = run_benchmark(args.corpus, sizes, args.embed, args.compare, args.k, queries)
+    print(format_rows(rows, args.k))
+    if not args.compare:
+        print(f"\nNo --compare modes: recall@{args.k} only reflects storage and retrieval "
+              f"of {args.embed}, not the quality of another backend")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
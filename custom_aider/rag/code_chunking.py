@@ -0,0 +1,125 @@
+"""Chunking of source files into function/class level pieces for code RAGs"""
+
+import ast
+
+# Line windows used for non-Python files, module-level code and
+# definitions too long to embed as one chunk
+WINDOW_LINES = 60
+WINDOW_OVERLAP = 10
+
+# Classes longer than this are split into a header chunk plus one chunk per method
+MAX_CLASS_LINES = 120
+
+# Files larger than this are skipped when indexing
+MAX_FILE_BYTES = 1024 * 1024
+
+
+def _chunk(lines, start, end, path, symbol=None, kind='window'):
+    """Build a chunk dict for 1-based inclusive line range [start, end]"""
+    return {
+        'text': "".join(lines[start - 1:end]).rstrip(),
+        'path': path,
+        'start_line': start,
+        'end_line': end,
+        'symbol': symbol,
+        'kind': kind,
+    }
+
+
+def _node_start(node):
+    """First line of a definition, including its decorators"""
+    decorators = getattr(node, 'decorator_list', None) or []
+    return min([node.lineno] + [d.lineno for d in decorators])
+
+
+def _windows(lines, path, first_line, last_line, symbol=None, kind='window',
+             window=WINDOW_LINES, overlap=WINDOW_OVERLAP):
+    """Split the line range [first_line, last_line] into overlapping windows"""
+    chunks = []
+    start = first_line
+    step = max(1, window - overlap)
+    while start <= last_line:
+        end = min(last_line, start + window - 1)
+        chunk = _chunk(lines, start, end, path, symbol, kind)
+        if chunk['text'].strip():
+            chunks.append(chunk)
+        if end == last_line:
+            break
+        start += step
+    return chunks
+
+
+def chunk_lines(text, path, window=WINDOW_LINES, overlap=WINDOW_OVERLAP,
+                first_line=1, last_line=None):
+    """Split a line range of text into overlapping windows"""
+    lines = text.splitlines(keepends=True)
+    return _windows(lines, path, first_line, last_line or len(lines),
+                    window=window, overlap=overlap)
+
+
+def chunk_python(text, path):
+    """Split Python source into function and class level chunks
+
+    Top-level functions become one chunk each. Small classes are kept whole;
+    large ones are split into a header chunk and one chunk per method. Code
+    between definitions (imports, constants, scripts, and class attributes
+    or nested classes between methods) falls back to line windows, as do
+    definitions longer than a window, which keep their symbol. Files that
+    do not parse are chunked by line windows only.
+    """
+    try:
+        tree = ast.parse(text)
+    except SyntaxError:
+        return chunk_lines(text, path)
+
+    lines = text.splitlines(keepends=True)
+    chunks = []
+    covered_to = 0
+
+    def add_gap(after, upto, symbol=None):
+        """Line windows for the lines strictly between after and upto"""
+        if upto > after + 1:
+            chunks.extend(_windows(lines, path, after + 1, upto - 1, symbol))
+
+    def add_definition(start, end, symbol, kind):
+        """One chunk for a definition, or windows if it is too long"""
+        if end - start + 1 > WINDOW_LINES:
+            chunks.extend(_windows(lines, path, start, end, symbol, kind))
+        else:
+            chunks.append(_chunk(lines, start, end, path, symbol, kind))
+
+    for node in tree.body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+
+        start, end = _node_start(node), node.end_lineno
+        add_gap(covered_to, start)
+
+        if isinstance(node, ast.ClassDef) and end - start + 1 > MAX_CLASS_LINES:
+            methods = [item for item in node.body
+                       if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))]
+            header_end = (_node_start(methods[0]) - 1) if methods else end
+            add_definition(start, header_end, node.name, 'class')
+            class_covered = header_end
+            for method in methods:
+                method_start = _node_start(method)
+                add_gap(class_covered, method_start, node.name)
+                add_definition(method_start, method.end_lineno,
+                               f"{node.name}.{method.name}", 'method')
+                class_covered = method.end_lineno
+            add_gap(class_covered, end + 1, node.name)
+        else:
+            kind = 'class' if isinstance(node, ast.ClassDef) else 'function'
+            add_definition(start, end, node.name, kind)
+
+        covered_to = end
+
+    add_gap(covered_to, len(lines) + 1)
+    return [chunk for chunk in chunks if chunk['text'].strip()]
+
+
+def chunk_file(text, path):
+    """Chunk a file using AST boundaries for Python and line windows otherwise"""
+    if path.endswith('.py'):
+        return chunk_python(text, path)
+    return chunk_lines(text, path)
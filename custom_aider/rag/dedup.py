@@ -0,0 +1,114 @@
+"""Exact and near-duplicate chunk elimination for RAG ingestion
+
+Chunks are first compared by a hash of their whitespace-normalized,
+lowercased text. Remaining chunks get a 64-bit SimHash over word
+shingles; two chunks whose SimHashes differ in at most MAX_DISTANCE bits
+are treated as near-duplicates. Candidates are found through banding:
+with 4 bands of 16 bits, any pair within distance 3 shares a band, so
+only chunks landing in the same band bucket are compared.
+
+The first chunk of each group is kept and records where all of its
+copies came from in its ``provenance`` metadata.
+"""
+
+import re
+import hashlib
+
+SIMHASH_BITS = 64
+BANDS = 4
+BAND_BITS = SIMHASH_BITS // BANDS
+MAX_DISTANCE = 3
+
+# Short chunks (headings, one-liners) only get exact matching; SimHash is too noisy
+MIN_NEAR_DUP_TOKENS = 12
+SHINGLE_SIZE = 3
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def content_hash(text):
+    """Hash of the normalized text, insensitive to case and whitespace"""
+    normalized = " ".join(text.lower().split())
+    return hashlib.sha1(normalized.encode("utf-8", "replace")).hexdigest()
+
+
+def simhash(tokens, bits=SIMHASH_BITS):
+    """SimHash fingerprint over word shingles"""
+    weights = [0] * bits
+    shingles = [" ".join(tokens[i:i + SHINGLE_SIZE])
+                for i in range(max(1, len(tokens) - SHINGLE_SIZE + 1))]
+    for shingle in shingles:
+        digest = hashlib.blake2b(shingle.encode("utf-8"), digest_size=bits // 8).digest()
+        value = int.from_bytes(digest, "little")
+        for bit in range(bits):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def _bands(fingerprint):
+    mask = (1 << BAND_BITS) - 1
+    return [(band, fingerprint >> (band * BAND_BITS) & mask) for band in range(BANDS)]
+
+
+def _provenance(node):
+    metadata = node.metadata or {}
+    entry = {
+        "start": getattr(node, "start_char_idx", None),
+        "end": getattr(node, "end_char_idx", None),
+    }
+    if metadata.get("header_path"):
+        entry["header_path"] = metadata["header_path"]
+    return entry
+
+
+def dedupe_nodes(nodes, max_distance=MAX_DISTANCE):
+    """Keep one node per group of exact or near-duplicate nodes
+
+    Returns the unique nodes (in original order) and the number of nodes
+    that were merged into another one.
+    """
+    unique = []
+    by_hash = {}
+    buckets = {}
+    fingerprints = []
+    merged = 0
+
+    for node in nodes:
+        text = node.get_content()
+        digest = content_hash(text)
+        keeper = by_hash.get(digest)
+
+        fingerprint = None
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+        if keeper is None and len(tokens) >= MIN_NEAR_DUP_TOKENS:
+            fingerprint = simhash(tokens)
+            candidates = {i for key in _bands(fingerprint) for i in buckets.get(key, ())}
+            for i in sorted(candidates):
+                if bin(fingerprint ^ fingerprints[i]).count("1") <= max_distance:
+                    keeper = unique[i]
+                    break
+
+        if keeper is not None:
+            keeper.metadata["provenance"].append(_provenance(node))
+            merged += 1
+            continue
+
+        node.metadata["provenance"] = [_provenance(node)]
+        # Provenance is bookkeeping; keep it out of embeddings and prompts
+        for keys in (node.excluded_embed_metadata_keys, node.excluded_llm_metadata_keys):
+            if "provenance" not in keys:
+                keys.append("provenance")
+
+        by_hash[digest] = node
+        if fingerprint is not None:
+            for key in _bands(fingerprint):
+                buckets.setdefault(key, []).append(len(unique))
+        fingerprints.append(fingerprint)
+        unique.append(node)
+
+    return unique, merged
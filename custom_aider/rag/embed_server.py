@@ -0,0 +1,307 @@
+"""Local embedding service shared by concurrent aider sessions
+
+One server process per user loads each embedding model once and serves
+all sessions over a Unix socket. Requests arriving from different clients
+within a short window are embedded together in one batch. The server is
+started on demand by the first client and exits after being idle.
+
+Run manually with:
+
+    python -m custom_aider.rag.embed_server [--socket PATH] [--idle-timeout SECONDS]
+
+Sessions use it when EXTN_AIDER_EMBED_SERVER=1 is set.
+"""
+
+import os
+import sys
+import json
+import time
+import fcntl
+import socket
+import struct
+import argparse
+import threading
+import subprocess
+import socketserver
+from pathlib import Path
+from concurrent.futures import Future
+from typing import Any, List
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+
+from .embeddings import create_embedding
+
+SOCKET_PATH = Path(os.environ.get(
+    "EXTN_AIDER_EMBED_SOCKET", Path.home() / ".extn_aider" / "embed.sock"
+))
+LOG_PATH = Path.home() / ".extn_aider" / "embed_server.log"
+
+USE_SERVER = os.environ.get("EXTN_AIDER_EMBED_SERVER", "") not in ("", "0")
+
+IDLE_TIMEOUT = 600       # seconds without requests before the server exits
+BATCH_WINDOW = 0.01      # seconds to wait for more requests before embedding
+MAX_BATCH = 256          # texts embedded in one model call
+STARTUP_TIMEOUT = 120    # seconds a client waits for a fresh server
+
+
+def _send(sock, message):
+    payload = json.dumps(message).encode("utf-8")
+    sock.sendall(struct.pack(">I", len(payload)) + payload)
+
+
+def _recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def _recv(sock):
+    (size,) = struct.unpack(">I", _recv_exact(sock, 4))
+    return json.loads(_recv_exact(sock, size))
+
+
+class Batcher:
+    """Collects embedding requests for one model and runs them in batches"""
+
+    def __init__(self, spec):
+        self.embed_model = create_embedding(spec)
+        self.pending = []
+        self.condition = threading.Condition()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, kind, texts):
+        future = Future()
+        with self.condition:
+            self.pending.append((kind, texts, future))
+            self.condition.notify()
+        return future
+
+    def _take_batch(self):
+        with self.condition:
+            while not self.pending:
+                self.condition.wait()
+        # Give other clients a moment to join this batch
+        time.sleep(BATCH_WINDOW)
+        with self.condition:
+            batch, size = [], 0
+            while self.pending and (not batch or size + len(self.pending[0][1]) <= MAX_BATCH):
+                item = self.pending.pop(0)
+                batch.append(item)
+                size += len(item[1])
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            try:
+                texts = [t for kind, texts, _ in batch if kind == "text" for t in texts]
+                vectors = iter(self.embed_model.get_text_embedding_batch(texts) if texts else [])
+                for kind, texts, future in batch:
+                    if kind == "query":
+                        future.set_result([self.embed_model.get_query_embedding(t) for t in texts])
+                    else:
+                        future.set_result([next(vectors) for _ in texts])
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+
+class EmbedServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server holding one Batcher per embedding spec"""
+
+    daemon_threads = True
+
+    def __init__(self, path, idle_timeout=IDLE_TIMEOUT):
+        self.batchers = {}
+        self.batchers_lock = threading.Lock()
+        self.spec_locks = {}
+        self.idle_timeout = idle_timeout
+        self.last_activity = time.monotonic()
+        super().__init__(str(path), EmbedRequestHandler)
+
+    def batcher(self, spec):
+        with self.batchers_lock:
+            batcher = self.batchers.get(spec)
+            if batcher is not None:
+                return batcher
+            spec_lock = self.spec_locks.setdefault(spec, threading.Lock())
+        # Load the model under its own lock, so a slow load only holds up
+        # requests for the same spec
+        with spec_lock:
+            with self.batchers_lock:
+                batcher = self.batchers.get(spec)
+            if batcher is None:
+                batcher = Batcher(spec)
+                with self.batchers_lock:
+                    self.batchers[spec] = batcher
+            return batcher
+
+    def touch(self):
+        self.last_activity = time.monotonic()
+
+    def watch_idle(self):
+        while time.monotonic() - self.last_activity < self.idle_timeout:
+            time.sleep(min(5, self.idle_timeout))
+        self.shutdown()
+
+
+class EmbedRequestHandler(socketserver.BaseRequestHandler):
+    """Serves length-prefixed JSON requests on one client connection"""
+
+    def handle(self):
+        while True:
+            try:
+                request = _recv(self.request)
+            except (ConnectionError, OSError, ValueError):
+                return
+
+            self.server.touch()
+            try:
+                if request.get("op") == "ping":
+                    response = {"ok": True, "pid": os.getpid()}
+                else:
+                    batcher = self.server.batcher(request["spec"])
+                    future = batcher.submit(request.get("kind", "text"), request["texts"])
+                    response = {"embeddings": future.result()}
+            except Exception as e:
+                response = {"error": str(e)}
+
+            self.server.touch()
+            _send(self.request, response)
+
+
+def _socket_lock(path):
+    """Exclusive lock serializing probing, binding and removing the socket
+    between server processes started at the same time"""
+    lock_file = open(path.with_name(path.name + ".lock"), "w")
+    fcntl.flock(lock_file, fcntl.LOCK_EX)
+    return lock_file
+
+
+def serve(path=SOCKET_PATH, idle_timeout=IDLE_TIMEOUT):
+    """Run the embedding server until it has been idle for idle_timeout seconds"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _socket_lock(path):
+        if path.exists():
+            # Refuse to steal the socket of a live server
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                    probe.connect(str(path))
+                return
+            except OSError:
+                path.unlink()
+        # Binds and starts listening before the lock is released
+        server = EmbedServer(path, idle_timeout)
+        inode = os.stat(path).st_ino
+
+    threading.Thread(target=server.watch_idle, daemon=True).start()
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        with _socket_lock(path):
+            # Only remove the socket this process bound
+            try:
+                if os.stat(path).st_ino == inode:
+                    path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _spawn_server(path):
+    """Start a detached server process for the socket path"""
+    LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    env = dict(os.environ)
+    package_root = str(Path(__file__).resolve().parents[2])
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, env.get("PYTHONPATH")]))
+    with open(LOG_PATH, "ab") as log:
+        subprocess.Popen(
+            [sys.executable, "-m", "custom_aider.rag.embed_server", "--socket", str(path)],
+            stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+            env=env, start_new_session=True,
+        )
+
+
+def connect(path=SOCKET_PATH, start=True):
+    """Connect to the embedding server, starting it if necessary"""
+    path = Path(path)
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    spawned = False
+    while True:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(str(path))
+            return sock
+        except OSError:
+            sock.close()
+            if not start or time.monotonic() > deadline:
+                raise ConnectionError(f"Embedding server not reachable at {path}")
+            if not spawned:
+                _spawn_server(path)
+                spawned = True
+            time.sleep(0.2)
+
+
+class RemoteEmbedding(BaseEmbedding):
+    """Embedding model proxy that forwards requests to the shared server"""
+
+    spec: str
+    socket_path: str = str(SOCKET_PATH)
+
+    _sock: Any = PrivateAttr(default=None)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "RemoteEmbedding"
+
+    def _request(self, kind, texts):
+        with self._lock:
+            for attempt in range(2):
+                if self._sock is None:
+                    self._sock = connect(self.socket_path)
+                try:
+                    _send(self._sock, {"spec": self.spec, "kind": kind, "texts": texts})
+                    response = _recv(self._sock)
+                    break
+                except (ConnectionError, OSError):
+                    # Server exited after idling; reconnect (and restart) once
+                    self._sock.close()
+                    self._sock = None
+                    if attempt:
+                        raise
+        if "error" in response:
+            raise RuntimeError(f"Embedding server error: {response['error']}")
+        return response["embeddings"]
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._request("query", [query])[0]
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._request("text", [text])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._request("text", texts)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared embedding server for aider sessions")
+    parser.add_argument("--socket", default=str(SOCKET_PATH), help="Unix socket path")
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT,
+                        help="Seconds without requests before exiting")
+    args = parser.parse_args()
+    serve(args.socket, args.idle_timeout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Pluggable embedding backends for document and code RAGs
+
+A backend is chosen with a spec string of the form ``backend[:model]``:
+
+    huggingface:BAAI/bge-small-en-v1.5   sentence-transformers on torch (default)
+    onnx:BAAI/bge-small-en-v1.5          ONNX Runtime on CPU
+    onnx-int8:BAAI/bge-small-en-v1.5     ONNX Runtime with dynamic int8 quantization
+    hash:384                             deterministic feature hashing, for tests
+
+Every RAG records the backend, model and dimension it was built with so
+queries are always embedded by a compatible backend.
+"""
+
+import os
+import re
+import math
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, List
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+
+DEFAULT_MODEL = "BAAI/bge-small-en-v1.5"
+DEFAULT_BACKEND = os.environ.get("EXTN_AIDER_EMBED_BACKEND", "huggingface")
+
+# Converted and quantized ONNX models are cached here
+MODEL_CACHE_DIR = Path.home() / ".extn_aider" / "models"
+
+# BGE models expect this prefix on queries (but not on passages)
+BGE_QUERY_INSTRUCTION = "Represent this sentence for searching relevant passages: "
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class HashEmbedding(BaseEmbedding):
+    """Deterministic feature-hashing embedder
+
+    Words and word bigrams are hashed into a fixed number of signed buckets
+    and the vector is L2 normalized. There is no model to download, results
+    are identical across machines, and texts sharing vocabulary score as
+    similar, which is enough for offline tests and benchmarks.
+    """
+
+    dimension: int = 384
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "HashEmbedding"
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimension
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            sign = 1.0 if value & 1 else -1.0
+            vector[(value >> 1) % self.dimension] += sign
+
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._embed(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._embed(query)
+
+
+class OnnxEmbedding(BaseEmbedding):
+    """BERT-style sentence embeddings computed with ONNX Runtime on CPU
+
+    Uses the ONNX export published alongside the HuggingFace model (or a
+    local directory holding ``model.onnx`` and ``tokenizer.json``). With
+    ``quantize=True`` the model is converted once to dynamic int8 and cached
+    under ``~/.extn_aider/models``, trading a little accuracy for throughput.
+    """
+
+    quantize: bool = False
+    max_length: int = 512
+    query_instruction: str = ""
+
+    _session: Any = PrivateAttr()
+    _tokenizer: Any = PrivateAttr()
+    _input_names: Any = PrivateAttr()
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, quantize: bool = False, **kwargs):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        if "query_instruction" not in kwargs and "bge" in model_name.lower():
+            kwargs["query_instruction"] = BGE_QUERY_INSTRUCTION
+        super().__init__(model_name=model_name, quantize=quantize, **kwargs)
+
+        model_path, tokenizer_path = self._resolve_files(model_name)
+        if quantize:
+            model_path = self._quantized(model_path, model_name)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = onnxruntime.InferenceSession(
+            str(model_path), options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self._session.get_inputs()}
+
+        self._tokenizer = Tokenizer.from_file(str(tokenizer_path))
+        self._tokenizer.enable_truncation(max_length=self.max_length)
+        self._tokenizer.enable_padding()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "OnnxEmbedding"
+
+    @staticmethod
+    def _resolve_files(model_name):
+        """Locate model.onnx and tokenizer.json locally or on the HF hub"""
+        local = Path(model_name).expanduser()
+        if local.is_dir():
+            return local / "model.onnx", local / "tokenizer.json"
+
+        from huggingface_hub import hf_hub_download
+        model_path = hf_hub_download(model_name, "onnx/model.onnx")
+        tokenizer_path = hf_hub_download(model_name, "tokenizer.json")
+        return Path(model_path), Path(tokenizer_path)
+
+    @staticmethod
+    def _quantized(model_path, model_name):
+        """Return a cached dynamic int8 copy of the model, creating it once"""
+        target_dir = MODEL_CACHE_DIR / re.sub(r"[^\w.-]", "_", model_name)
+        target = target_dir / "model-int8.onnx"
+        if not target.exists():
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            target_dir.mkdir(parents=True, exist_ok=True)
+            quantize_dynamic(str(model_path), str(target), weight_type=QuantType.QInt8)
+        return target
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        import numpy as np
+
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        last_hidden_state = self._session.run(None, feeds)[0]
+
+        # CLS pooling followed by L2 normalization, as for bge models
+        pooled = last_hidden_state[:, 0]
+        pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.tolist()
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._embed([self.query_instruction + query])[0]
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._embed([text])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+
+
+def _huggingface(model):
+    from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+    os.environ["TOKENIZERS_PARALLELISM"] = "true"
+    return HuggingFaceEmbedding(model_name=model or DEFAULT_MODEL)
+
+
+def _onnx(model):
+    return OnnxEmbedding(model_name=model or DEFAULT_MODEL)
+
+
+def _onnx_int8(model):
+    return OnnxEmbedding(model_name=model or DEFAULT_MODEL, quantize=True)
+
+
+def _hash(model):
+    return HashEmbedding(model_name=f"hash-{model or 384}", dimension=int(model or 384))
+
+
+# Backend name -> factory taking the model part of the spec (or None)
+EMBEDDING_BACKENDS = {
+    "huggingface": _huggingface,
+    "onnx": _onnx,
+    "onnx-int8": _onnx_int8,
+    "hash": _hash,
+}
+
+
+def parse_spec(spec=None):
+    """Split a ``backend[:model]`` spec into its parts"""
+    spec = spec or DEFAULT_BACKEND
+    backend, _, model = spec.partition(":")
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(
+            f"Unknown embedding backend '{backend}'. "
+            f"Available: {', '.join(EMBEDDING_BACKENDS)}"
+        )
+    if not model:
+        model = "384" if backend == "hash" else DEFAULT_MODEL
+    return backend, model
+
+
+def create_embedding(spec=None):
+    """Instantiate the embedding model for a spec"""
+    backend, model = parse_spec(spec)
+    return EMBEDDING_BACKENDS[backend](model)
+
+
+def describe(spec, embed_model) -> Dict[str, Any]:
+    """Describe a backend for storage in RAG metadata"""
+    backend, model = parse_spec(spec)
+    return {
+        "backend": backend,
+        "model": model,
+        "dim": len(embed_model.get_text_embedding("dimension probe")),
+    }
+
+
+# Metadata for RAGs created before backends were recorded
+LEGACY_EMBEDDING = {"backend": "huggingface", "model": DEFAULT_MODEL, "dim": 384}
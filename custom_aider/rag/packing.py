@@ -0,0 +1,197 @@
+"""Token-budgeted packing of retrieved RAG chunks before they enter the chat"""
+
+import os
+import re
+import hashlib
+from collections import OrderedDict
+
+# Default number of tokens a single RAG injection may add to the chat
+DEFAULT_TOKEN_BUDGET = int(os.environ.get("EXTN_AIDER_RAG_TOKEN_BUDGET", "2048"))
+
+# Tokens reserved per chunk for the result header and source line
+CHUNK_OVERHEAD_TOKENS = 16
+
+# Chunks whose offsets are at most this many characters apart are merged
+MERGE_GAP_CHARS = 1
+
+_BUDGET_ARG = re.compile(r'\s*--budget=(\d+)\s*')
+
+
+class TokenCounter:
+    """Counts tokens with a model's tokenizer, caching results per text"""
+
+    def __init__(self, model=None, max_entries=4096):
+        self.model = model
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+
+    def _count(self, text):
+        if self.model is not None:
+            try:
+                return self.model.token_count(text)
+            except Exception:
+                pass
+        # Rough fallback when no tokenizer is available
+        return max(1, len(text) // 4)
+
+    def __call__(self, text):
+        key = hashlib.sha1(text.encode('utf-8', 'replace')).digest()
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        count = self._count(text)
+        self._cache[key] = count
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return count
+
+
+_counters = {}
+
+def get_token_counter(model=None):
+    """Return the shared token counter for a model (one per model name)"""
+    name = getattr(model, 'name', None)
+    counter = _counters.get(name)
+    if counter is None:
+        counter = TokenCounter(model)
+        _counters[name] = counter
+    return counter
+
+
+def split_budget_arg(args, default=DEFAULT_TOKEN_BUDGET):
+    """Strip an optional --budget=N from command args, returning (args, budget)"""
+    match = _BUDGET_ARG.search(args)
+    if not match:
+        return args, default
+    args = (args[:match.start()] + " " + args[match.end():]).strip()
+    return args, int(match.group(1))
+
+
+def _normalize(text):
+    return " ".join(text.split())
+
+
+def _dedupe(chunks):
+    """Drop chunks that repeat or are contained in a better-scored chunk"""
+    kept = []
+    seen = set()
+    for chunk in sorted(chunks, key=lambda c: c.get('score') or 0, reverse=True):
+        norm = _normalize(chunk['text'])
+        if not norm:
+            continue
+        digest = hashlib.sha1(norm.encode('utf-8', 'replace')).digest()
+        if digest in seen:
+            continue
+        if any(norm in _normalize(other['text']) for other in kept):
+            continue
+        seen.add(digest)
+        kept.append(chunk)
+    return kept
+
+
+def _merge_adjacent(chunks):
+    """Merge chunks from the same source whose character ranges touch or overlap
+
+    Offsets describe the unstripped text, so merging works on 'raw' when
+    a chunk has it and strips the result afterwards.
+    """
+    by_source = {}
+    unmerged = []
+    for chunk in chunks:
+        if chunk.get('start') is None or chunk.get('end') is None:
+            unmerged.append(chunk)
+        else:
+            by_source.setdefault(chunk.get('source'), []).append(chunk)
+
+    merged = []
+    for source_chunks in by_source.values():
+        source_chunks.sort(key=lambda c: c['start'])
+        current = dict(source_chunks[0])
+        current['raw'] = current.get('raw', current['text'])
+        for chunk in source_chunks[1:]:
+            if chunk['start'] <= current['end'] + MERGE_GAP_CHARS:
+                overlap = current['end'] - chunk['start']
+                if chunk['end'] > current['end']:
+                    tail = chunk.get('raw', chunk['text'])[max(0, overlap):]
+                    joiner = "" if overlap >= 0 else "\n"
+                    current['raw'] = current['raw'] + joiner + tail
+                    current['text'] = current['raw'].strip()
+                    current['end'] = chunk['end']
+                current['score'] = max(current.get('score') or 0, chunk.get('score') or 0)
+            else:
+                merged.append(current)
+                current = dict(chunk)
+                current['raw'] = current.get('raw', current['text'])
+        merged.append(current)
+
+    return merged + unmerged
+
+
+def _truncate(text, max_tokens, count_tokens):
+    """Return the longest line-aligned prefix of text that fits in max_tokens"""
+    lines = text.splitlines(keepends=True)
+    lo, hi = 0, len(lines)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens("".join(lines[:mid])) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    if lo:
+        return "".join(lines[:lo]).rstrip()
+
+    # A single oversized line: fall back to a proportional character cut
+    ratio = max_tokens / max(1, count_tokens(text))
+    return text[:int(len(text) * ratio)].rstrip()
+
+
+def pack_chunks(chunks, budget=DEFAULT_TOKEN_BUDGET, count_tokens=None):
+    """Deduplicate, merge and trim retrieved chunks to fit a token budget
+
+    Each chunk is a dict with 'text', and optionally 'source', 'score' and
+    'start'/'end' character offsets into the source document. Returns the
+    packed chunks in descending score order and the number of chunks that
+    were dropped or truncated to respect the budget.
+    """
+    count_tokens = count_tokens or get_token_counter()
+
+    candidates = _merge_adjacent(_dedupe(chunks))
+    candidates.sort(key=lambda c: c.get('score') or 0, reverse=True)
+
+    packed = []
+    trimmed = 0
+    remaining = budget
+    for chunk in candidates:
+        available = remaining - CHUNK_OVERHEAD_TOKENS
+        if available <= 0:
+            trimmed += 1
+            continue
+
+        tokens = count_tokens(chunk['text'])
+        if tokens > available:
+            trimmed += 1
+            text = _truncate(chunk['text'], available, count_tokens)
+            if not text:
+                continue
+            chunk = dict(chunk, text=text, truncated=True)
+            tokens = count_tokens(text)
+
+        packed.append(chunk)
+        remaining -= tokens + CHUNK_OVERHEAD_TOKENS
+
+    return packed, trimmed
+
+
+def split_context(context, source=None):
+    """Split a single context blob into paragraph chunks for packing"""
+    chunks = []
+    paragraphs = [p for p in re.split(r'\n\s*\n', context) if p.strip()]
+    for i, paragraph in enumerate(paragraphs):
+        chunks.append({
+            'text': paragraph.strip(),
+            'source': source,
+            # Preserve the server's ordering as the relevance signal
+            'score': 1.0 - i / max(1, len(paragraphs)),
+        })
+    return chunks
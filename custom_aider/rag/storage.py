@@ -0,0 +1,204 @@
+"""Compact on-disk persistence for RAG storage contexts
+
+llama-index persists RAGs as pretty-printed JSON, with every embedding
+written out as a list of decimal floats. The compact format stores:
+
+- ``compact.json``: a small manifest describing the files below
+- ``store.<generation>.bin``: docstore, index store and vector store
+  metadata, serialized with msgpack (or JSON) and compressed with zstd
+  (or zlib)
+- ``vectors_<store>.<generation>.f32``: raw little-endian float32
+  embedding rows
+
+Each save writes data files under a new generation and then atomically
+replaces the manifest, so a save interrupted half way over an existing
+RAG leaves the previous version intact.
+
+msgpack and zstandard are used when installed; otherwise the standard
+library fallbacks keep the format usable everywhere. The manifest records
+which codecs were used, so either side can read the other's files.
+"""
+
+import os
+import sys
+import json
+import uuid
+import zlib
+import shutil
+from array import array
+from pathlib import Path
+
+from llama_index.core import StorageContext
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "compact.json"
+# Store file of RAGs saved before data files had generations
+STORE_FILE = "store.bin"
+
+FORMATS = ("json", "compact")
+
+
+def is_compact(rag_dir) -> bool:
+    """Whether a RAG directory uses the compact format"""
+    return (Path(rag_dir) / MANIFEST_FILE).exists()
+
+
+def _serialize(data):
+    if msgpack is not None:
+        return "msgpack", msgpack.packb(data, use_bin_type=True)
+    return "json", json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def _deserialize(serializer, payload):
+    if serializer == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("This RAG was saved with msgpack; install it with: pip install msgpack")
+        return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+    return json.loads(payload.decode("utf-8"))
+
+
+def _compress(payload):
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=10).compress(payload)
+    return "zlib", zlib.compress(payload, 9)
+
+
+def _decompress(compression, payload):
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("This RAG was saved with zstd; install it with: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    return zlib.decompress(payload)
+
+
+def _write_vectors(path, ids, embedding_dict):
+    """Write embeddings as float32 rows in ids order, returning the dimension"""
+    dim = len(embedding_dict[ids[0]]) if ids else 0
+    values = array("f")
+    for node_id in ids:
+        values.extend(embedding_dict[node_id])
+    if sys.byteorder != "little":
+        values.byteswap()
+    path.write_bytes(values.tobytes())
+    return dim
+
+
+def _read_vectors(path, ids, dim):
+    values = array("f")
+    values.frombytes(path.read_bytes())
+    if sys.byteorder != "little":
+        values.byteswap()
+    return {
+        node_id: values[i * dim:(i + 1) * dim].tolist()
+        for i, node_id in enumerate(ids)
+    }
+
+
+def save_compact(storage_context, rag_dir):
+    """Persist a storage context in the compact format"""
+    rag_dir = Path(rag_dir)
+    rag_dir.mkdir(parents=True, exist_ok=True)
+    generation = uuid.uuid4().hex[:8]
+
+    data = storage_context.to_dict()
+    vector_files = {}
+    for key, store in data["vector_store"].items():
+        embedding_dict = store.pop("embedding_dict")
+        ids = list(embedding_dict)
+        filename = f"vectors_{key}.{generation}.f32"
+        dim = _write_vectors(rag_dir / filename, ids, embedding_dict)
+        store["embedding_ids"] = ids
+        vector_files[key] = {"file": filename, "dim": dim, "count": len(ids)}
+
+    serializer, payload = _serialize(data)
+    compression, payload = _compress(payload)
+    store_file = f"store.{generation}.bin"
+    (rag_dir / store_file).write_bytes(payload)
+
+    # Swapped in last and atomically: until then the old manifest still
+    # describes the old files, which are left untouched
+    tmp_manifest = rag_dir / f"{MANIFEST_FILE}.tmp"
+    tmp_manifest.write_text(json.dumps({
+        "format": FORMAT_VERSION,
+        "serializer": serializer,
+        "compression": compression,
+        "store": store_file,
+        "vectors": vector_files,
+    }, indent=2))
+    os.replace(tmp_manifest, rag_dir / MANIFEST_FILE)
+
+    # Data files of previous saves
+    current = {store_file} | {info["file"] for info in vector_files.values()}
+    for path in list(rag_dir.glob("store*.bin")) + list(rag_dir.glob("vectors_*.f32")):
+        if path.name not in current:
+            path.unlink(missing_ok=True)
+
+
+def load_compact(rag_dir):
+    """Load a storage context saved with save_compact"""
+    rag_dir = Path(rag_dir)
+    manifest = json.loads((rag_dir / MANIFEST_FILE).read_text())
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported compact RAG format: {manifest.get('format')}")
+
+    store_file = manifest.get("store", STORE_FILE)
+    payload = _decompress(manifest["compression"], (rag_dir / store_file).read_bytes())
+    data = _deserialize(manifest["serializer"], payload)
+
+    for key, store in data["vector_store"].items():
+        info = manifest["vectors"][key]
+        ids = store.pop("embedding_ids")
+        store["embedding_dict"] = _read_vectors(rag_dir / info["file"], ids, info["dim"])
+
+    return StorageContext.from_dict(data)
+
+
+def save_storage(storage_context, rag_dir, fmt="compact"):
+    """Persist a storage context in the given format"""
+    if fmt == "compact":
+        save_compact(storage_context, rag_dir)
+    else:
+        storage_context.persist(persist_dir=str(rag_dir))
+
+
+def load_storage(rag_dir):
+    """Load a storage context in whichever format the directory holds"""
+    if is_compact(rag_dir):
+        return load_compact(rag_dir)
+    return StorageContext.from_defaults(persist_dir=str(rag_dir))
+
+
+def convert(rag_dir, fmt):
+    """Rewrite a persisted RAG in another format, replacing it atomically"""
+    rag_dir = Path(rag_dir)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Use one of: {', '.join(FORMATS)}")
+    if (fmt == "compact") == is_compact(rag_dir):
+        return False
+
+    storage_context = load_storage(rag_dir)
+    tmp_dir = rag_dir.with_name(rag_dir.name + ".converting")
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    save_storage(storage_context, tmp_dir, fmt)
+
+    old_dir = rag_dir.with_name(rag_dir.name + ".old")
+    rag_dir.rename(old_dir)
+    tmp_dir.rename(rag_dir)
+    shutil.rmtree(old_dir)
+    return True
+
+
+def dir_size(path) -> int:
+    """Total size in bytes of all files below path"""
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())